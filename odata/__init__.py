@@ -1,6 +1,12 @@
 import logging
 
 from odata.client import Client
+from odata._http import PoolOptions
+from odata._limits import LimitOptions
+from odata._retry import RetryPolicy
+from odata._cache import CacheOptions
+from odata._store import MetadataStore
+from odata._archive import ArchiveStore
 from odata._query_constructors import QueryFilter as Filter
 
 from odata.__keycloak.__auth import Platform
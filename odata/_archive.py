@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import socket
+import time
+import typing
+import logging
+import uuid
+
+if typing.TYPE_CHECKING:
+    from odata._download import DownloadResult
+
+logger = logging.getLogger("odata.http")
+
+
+@dataclasses.dataclass
+class ArchiveEntry:
+    """
+    Complete archive of product kept in ArchiveStore.
+
+    @var checksums: Checksum values of product by algorithm, as listed in catalogue when archive was stored
+    @var verified: Verification result per algorithm, empty if nothing was verified
+    @var completed: Unix time archive was stored
+    """
+    id: str
+    name: str
+    file: str
+    size: int
+    checksums: dict[str, str] = dataclasses.field(default_factory=dict)
+    verified: dict[str, bool] = dataclasses.field(default_factory=dict)
+    completed: float = 0.0
+
+
+class ArchiveStore:
+    """
+    Directory of product archives keyed by product Id, shared by processes using the same directory. Archive of
+    product is '{id}.zip' and its size and checksums are recorded in '{id}.json' manifest once it is complete, so
+    product with a matching manifest is not downloaded again.
+
+    Product is downloaded by single process at a time, '{id}.lock' file is held meanwhile. Holder refreshes its
+    modification time, lock left behind by crashed process is taken over once it is older than stale seconds.
+
+    When max_bytes is set, least recently used archives are removed after every stored one until total size fits.
+
+    @param directory: Directory of archives, created if it does not exist
+    @param max_bytes: Highest total size of archives, unbounded by default
+    @param stale: Seconds after which lock that was not refreshed is taken over
+    """
+    __poll: float = 0.2
+
+    def __init__(self, directory: str, max_bytes: typing.Optional[int] = None, stale: float = 60.0):
+        self.directory: str = os.path.abspath(directory)
+        self.max_bytes: typing.Optional[int] = max_bytes
+        self.stale: float = stale
+        self.evictions: int = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, product_id: str) -> str:
+        return os.path.join(self.directory, f"{product_id}.zip")
+
+    def __manifest(self, product_id: str) -> str:
+        return os.path.join(self.directory, f"{product_id}.json")
+
+    def __lock(self, product_id: str) -> str:
+        return os.path.join(self.directory, f"{product_id}.lock")
+
+    def get(self, product_id: str, checksums: typing.Optional[list[dict]] = None,
+            verified: bool = False) -> typing.Optional[ArchiveEntry]:
+        """
+        Stored archive of product, marked as recently used.
+
+        @param checksums: Current checksums of product in catalogue format, archive stored with different ones is
+                          not returned
+        @param verified: Only archive verified against its checksums is returned, if it had any
+        @return: Entry or None if archive is missing, incomplete or does not match checksums
+        """
+        manifest = self.__manifest(product_id)
+        try:
+            with open(manifest) as f:
+                entry = ArchiveEntry(**json.load(f))
+            size = os.path.getsize(entry.file)
+        except (OSError, ValueError, TypeError):
+            return None
+        if size != entry.size or not all(entry.verified.values()):
+            return None
+        if verified and entry.checksums and not entry.verified:
+            return None
+        expected = {c["Algorithm"]: c["Value"] for c in checksums or [] if c.get("Value")}
+        if any(entry.checksums.get(algorithm) != value for algorithm, value in expected.items()):
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(manifest)
+        return entry
+
+    def put(self, product_id: str, name: str, result: DownloadResult,
+            checksums: typing.Optional[list[dict]] = None) -> ArchiveEntry:
+        """
+        Records complete archive downloaded to path(product_id).
+
+        @param checksums: Checksums of product in catalogue format, result has verification against them
+        """
+        entry = ArchiveEntry(product_id, name, result.file, result.size,
+                             {c["Algorithm"]: c["Value"] for c in checksums or [] if c.get("Value")},
+                             dict(result.checksums), time.time())
+        manifest = self.__manifest(product_id)
+        with open(f"{manifest}.tmp", "w") as f:
+            json.dump(dataclasses.asdict(entry), f)
+        os.replace(f"{manifest}.tmp", manifest)
+        return entry
+
+    def remove(self, product_id: str):
+        """ Removes archive and its manifest, manifest first so archive is never served while being removed. """
+        for path in (self.__manifest(product_id), self.path(product_id)):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    @property
+    def entries(self) -> list[ArchiveEntry]:
+        """ Stored archives, least recently used first. """
+        used = []
+        for file in os.listdir(self.directory):
+            if not file.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, file)
+            try:
+                with open(path) as f:
+                    used.append((os.path.getmtime(path), ArchiveEntry(**json.load(f))))
+            except (OSError, ValueError, TypeError):
+                continue
+        return [entry for _, entry in sorted(used, key=lambda u: u[0])]
+
+    @property
+    def size(self) -> int:
+        return sum(entry.size for entry in self.entries)
+
+    def evict(self, keep: typing.Optional[str] = None) -> list[str]:
+        """
+        Removes least recently used archives until total size is within max_bytes. Archives locked by running
+        downloads and keep are left in place.
+
+        @return: Ids of removed archives
+        """
+        if self.max_bytes is None:
+            return []
+        entries = self.entries
+        total = sum(entry.size for entry in entries)
+        removed = []
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.id == keep or not self.__acquire(entry.id):
+                continue
+            try:
+                self.remove(entry.id)
+            finally:
+                self.__release(entry.id)
+            total -= entry.size
+            removed.append(entry.id)
+        self.evictions += len(removed)
+        if removed:
+            logger.debug(f"Archives evicted: {len(removed)}, {total / 1000000:.1f} MB kept")
+        return removed
+
+    @contextlib.asynccontextmanager
+    async def lock(self, product_id: str) -> typing.AsyncIterator[None]:
+        """
+        Holds lock of product across processes, waits while other holder keeps it fresh.
+        """
+        while not self.__acquire(product_id):
+            await asyncio.sleep(self.__poll)
+        heartbeat = asyncio.ensure_future(self.__heartbeat(product_id))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            self.__release(product_id)
+
+    def __acquire(self, product_id: str) -> bool:
+        path = self.__lock(product_id)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < self.stale:
+                    return False
+                claimed = f"{path}.{uuid.uuid4().hex}"
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                return self.__acquire(product_id)
+            return self.__take_over(product_id, claimed)
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{socket.gethostname()} {os.getpid()}")
+        return True
+
+    def __take_over(self, product_id: str, claimed: str) -> bool:
+        """
+        Removes stale lock moved aside to claimed name. Only one process moves the file away, fresh lock created by
+        other process meanwhile is put back.
+        """
+        path = self.__lock(product_id)
+        try:
+            fresh = time.time() - os.path.getmtime(claimed) < self.stale
+            if fresh:
+                with contextlib.suppress(FileExistsError):
+                    os.link(claimed, path)
+            os.remove(claimed)
+        except FileNotFoundError:
+            return False
+        if fresh:
+            return False
+        logger.debug(f"Lock of {product_id} not refreshed for {self.stale}s, taken over")
+        return self.__acquire(product_id)
+
+    def __release(self, product_id: str):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.__lock(product_id))
+
+    async def __heartbeat(self, product_id: str):
+        while True:
+            await asyncio.sleep(self.stale / 3)
+            with contextlib.suppress(OSError):
+                os.utime(self.__lock(product_id))
@@ -8,9 +8,7 @@ if TYPE_CHECKING:
 
 
 from odata._workflow import WorkflowOptions
-
-
-time_format = "%Y-%m-%dT%H:%M:%S.%fZ"
+from odata._helpers import TimeConverter
 
 
 class BatchOrders:
@@ -80,7 +78,7 @@ class ODataBatchOrder(ODataBatchObject):
         self.estimated: datetime.datetime = estimated_date
 
         self.keycloak_uuid = keycloak_uuid
-        self.summary: BatchOrderSummary = BatchOrderSummary.factory(summary)
+        self.summary: Optional[BatchOrderSummary] = BatchOrderSummary.factory(summary) if summary else None
 
         self.workflow: BatchOrderWorkflow = BatchOrderWorkflow(workflow_name, workflow_id, workflow_options)
 
@@ -92,7 +90,7 @@ class ODataBatchOrder(ODataBatchObject):
             workflow_name=data["WorkflowName"],
             order_id=data["Id"],
             status=data["Status"],
-            submission_date=datetime.datetime.strptime(data["SubmissionDate"], time_format),
+            submission_date=TimeConverter.to_date(data["SubmissionDate"]),
             keycloak_uuid=data["KeycloakUUID"],
             workflow_id=data["WorkflowId"],
             priority=data.get("Priority"),
@@ -100,7 +98,7 @@ class ODataBatchOrder(ODataBatchObject):
             notification_status=data.get("NotificationStatus"),
             notification_username=data.get("NotificationEpUsername"),
             workflow_options=data.get("WorkflowOptions"),
-            estimated_date=data.get("EstimatedDate"),
+            estimated_date=TimeConverter.to_date(data["EstimatedDate"]) if data.get("EstimatedDate") else None,
             summary=data.get("Summary")
         )
 
@@ -137,12 +135,9 @@ class BatchOrderSummary:
 
     @classmethod
     def factory(cls, data) -> BatchOrderSummary:
-        data.update(
-            last_order_change_timestamp=datetime.datetime.strptime(data["last_order_change_timestamp"], time_format)
-        )
-
         summary = BatchOrderSummary(
-            **data
+            **{**data, "last_order_item_change_timestamp": TimeConverter.to_date(
+                data["last_order_item_change_timestamp"])}
         )
 
         return summary
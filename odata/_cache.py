@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import re
+import time
+import typing
+import logging
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import aiohttp
+
+logger = logging.getLogger("odata.http")
+
+
+@dataclasses.dataclass
+class CacheOptions:
+    """
+    In-process cache of successful GET responses of catalogue.
+
+    @var ttl: Seconds response is served from cache
+    @var max_entries: Highest number of cached responses, least recently used ones are evicted first
+    @var max_bytes: Highest total size of cached bodies, larger single bodies are not cached
+    """
+    ttl: float = 60.0
+    max_entries: int = 256
+    max_bytes: int = 64 * 1024 * 1024
+
+
+@dataclasses.dataclass
+class _Entry:
+    expires: float
+    response: aiohttp.ClientResponse
+    body: bytes
+
+
+class ResponseCache:
+    """
+    TTL and LRU bounded cache of response bodies keyed by url with canonical query parameters, so the same query
+    written with different parameter order or $filter whitespace shares one entry. Bodies are kept raw and decoded on
+    every hit, callers never share decoded objects.
+    """
+    __whitespace: re.Pattern = re.compile(r"\s+")
+    __parentheses: re.Pattern = re.compile(r"\(\s+|\s+\)")
+
+    def __init__(self, options: typing.Optional[CacheOptions] = None):
+        self.options: CacheOptions = options or CacheOptions()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.size: int = 0
+
+        self.__entries: collections.OrderedDict[str, _Entry] = collections.OrderedDict()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.__entries), "bytes": self.size}
+
+    @classmethod
+    def key(cls, url: str, params: typing.Optional[typing.Mapping[str, typing.Any]] = None) -> str:
+        """ Url with query parameters of url and params sorted and $filter whitespace normalised. """
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True) + [(k, cls.__value(v)) for k, v in (params or {}).items()]
+        query = sorted((k, cls.__filter(v) if k == "$filter" else v) for k, v in query)
+        return f"{parts.scheme}://{parts.netloc}{parts.path}?{urlencode(query)}"
+
+    @staticmethod
+    def __value(value: typing.Any) -> str:
+        if isinstance(value, bool):
+            return str(value).lower()
+        return str(value)
+
+    @classmethod
+    def __filter(cls, query: str) -> str:
+        """ Whitespace outside of string literals is collapsed, quoted parts are kept as they are. """
+        parts = query.split("'")
+        for i in range(0, len(parts), 2):
+            parts[i] = cls.__parentheses.sub(lambda m: m.group().strip(), cls.__whitespace.sub(" ", parts[i]))
+        return "'".join(parts).strip()
+
+    def get(self, key: str) -> typing.Optional[tuple[aiohttp.ClientResponse, bytes]]:
+        """ Hits are counted here, misses by caller once it sends request, callers joining it are not misses. """
+        entry = self.__entries.get(key)
+        if entry is not None and entry.expires < time.monotonic():
+            self.__remove(key)
+            entry = None
+        if entry is None:
+            return None
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return entry.response, entry.body
+
+    def put(self, key: str, response: aiohttp.ClientResponse, body: bytes):
+        if len(body) > self.options.max_bytes:
+            return
+        if key in self.__entries:
+            self.__remove(key)
+        self.__entries[key] = _Entry(time.monotonic() + self.options.ttl, response, body)
+        self.size += len(body)
+        while len(self.__entries) > self.options.max_entries or self.size > self.options.max_bytes:
+            self.__remove(next(iter(self.__entries)))
+            self.evictions += 1
+
+    def clear(self):
+        self.__entries.clear()
+        self.size = 0
+
+    def __remove(self, key: str):
+        self.size -= len(self.__entries.pop(key).body)
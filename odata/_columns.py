@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import math
+import typing
+import logging
+
+if typing.TYPE_CHECKING:
+    import numpy
+    import pyarrow
+    from odata._types import OProduct
+
+from odata._helpers import TimeConverter, GeoJson
+
+logger = logging.getLogger("odata")
+
+
+class ProductColumns:
+    """
+    Product records as typed columns, built straight from catalogue JSON without OProduct objects.
+
+    Columns are id, name, content_type, content_length, online, s3_path, dates (origin_date, publication_date,
+    modification_date, eviction_date, content_start, content_end), footprint bounding box (min_x, min_y, max_x,
+    max_y) and one "attribute.<Name>" column per attribute found, None where product lacks it.
+    """
+    __fields: dict[str, tuple[str, typing.Any]] = {
+        "id": ("Id", ""),
+        "name": ("Name", ""),
+        "content_type": ("ContentType", ""),
+        "content_length": ("ContentLength", 0),
+        "online": ("Online", False),
+        "s3_path": ("S3Path", ""),
+    }
+    __dates: dict[str, str] = {
+        "origin_date": "OriginDate",
+        "publication_date": "PublicationDate",
+        "modification_date": "ModificationDate",
+        "eviction_date": "EvictionDate",
+    }
+    __bounds: tuple[str, ...] = ("min_x", "min_y", "max_x", "max_y")
+    __kinds: dict[str, str] = {"content_length": "int", "online": "bool"}
+    __value_types: dict[str, str] = {"Integer": "int", "Double": "float", "DateTimeOffset": "date", "Boolean": "bool"}
+
+    def __init__(self):
+        self.rows: int = 0
+        self.__columns: dict[str, list] = {name: [] for name in [*self.__fields, *self.__dates, "content_start",
+                                                                   "content_end", *self.__bounds]}
+        self.__attributes: dict[str, list] = {}
+        self.__attribute_types: dict[str, str] = {}
+
+    @classmethod
+    def from_products(cls, products: typing.Iterable[OProduct]) -> ProductColumns:
+        columns = cls()
+        for product in products:
+            footprint = product.geo_footprint
+            columns.add(product._record(), footprint.bounds if footprint and len(footprint) else None)
+        return columns
+
+    def extend(self, values: typing.Iterable[dict]):
+        """ Adds products of page "value" list. """
+        for data in values:
+            self.add(data)
+
+    def add(self, data: dict, bounds: typing.Optional[tuple[float, float, float, float]] = None):
+        """
+        Adds single product record.
+
+        @param bounds: Footprint bounding box, computed from GeoFootprint of data if not provided
+        """
+        columns = self.__columns
+        for name, (key, default) in self.__fields.items():
+            value = data.get(key)
+            columns[name].append(default if value is None else value)
+        for name, key in self.__dates.items():
+            columns[name].append(data.get(key) or None)
+        content_date = data.get("ContentDate") or {}
+        columns["content_start"].append(content_date.get("Start") or None)
+        columns["content_end"].append(content_date.get("End") or None)
+
+        if bounds is None:
+            bounds = GeoJson.bounds(data.get("GeoFootprint"))
+        for name, value in zip(self.__bounds, bounds or (math.nan,) * 4):
+            columns[name].append(value)
+
+        for attribute in data.get("Attributes", []):
+            name = f"attribute.{attribute['Name']}"
+            column = self.__attributes.setdefault(name, [])
+            column.extend([None] * (self.rows - len(column)))
+            column.append(attribute.get("Value"))
+            self.__attribute_types.setdefault(name, self.__value_types.get(attribute.get("ValueType"), "object"))
+        self.rows += 1
+
+    def to_columns(self) -> dict[str, list]:
+        """
+        Columns as lists, dates are kept as received ISO 8601 strings, None if missing.
+        """
+        for column in self.__attributes.values():
+            column.extend([None] * (self.rows - len(column)))
+        return {**self.__columns, **self.__attributes}
+
+    def to_numpy(self) -> dict[str, numpy.ndarray]:
+        """
+        Columns as NumPy arrays: dates are datetime64[ms] in UTC with NaT if missing, bounding box float64 with NaN
+        if footprint is missing. Integer attributes with missing values become float64.
+
+        @raise ImportError: If numpy is not installed
+        """
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError("to_numpy requires numpy, install it with 'pip install numpy'") from e
+
+        arrays: dict[str, numpy.ndarray] = {}
+        for name, column in self.to_columns().items():
+            kind = self.__kind(name)
+            if kind == "date":
+                arrays[name] = TimeConverter.to_datetime64(column)
+            elif kind == "float" or (kind == "int" and None in column):
+                arrays[name] = numpy.array([math.nan if v is None else v for v in column], dtype="float64")
+            elif kind == "int":
+                arrays[name] = numpy.array(column, dtype="int64")
+            elif kind == "bool" and None not in column:
+                arrays[name] = numpy.array(column, dtype="bool")
+            else:
+                arrays[name] = numpy.array(column, dtype=object)
+        return arrays
+
+    def to_arrow(self) -> pyarrow.Table:
+        """
+        Columns as Arrow table, dates are timestamp[ms, UTC].
+
+        @raise ImportError: If pyarrow is not installed, or numpy dates are converted with
+        """
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError("to_arrow requires pyarrow and numpy, install them with 'pip install pyarrow numpy'") \
+                from e
+
+        table: dict[str, pyarrow.Array] = {}
+        for name, column in self.to_columns().items():
+            if self.__kind(name) == "date":
+                table[name] = pyarrow.array(TimeConverter.to_datetime64(column), type=pyarrow.timestamp("ms", tz="UTC"))
+            else:
+                table[name] = pyarrow.array(column, from_pandas=True)
+        return pyarrow.table(table)
+
+    def __kind(self, name: str) -> str:
+        if name in self.__dates or name in ("content_start", "content_end"):
+            return "date"
+        if name in self.__bounds:
+            return "float"
+        if name in self.__kinds:
+            return self.__kinds[name]
+        return self.__attribute_types.get(name, "object")
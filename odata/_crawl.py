@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+import math
+import typing
+import logging
+
+if typing.TYPE_CHECKING:
+    from odata.client import Client
+
+import odata.errors as errors
+from odata._types import OProduct
+
+logger = logging.getLogger("odata")
+
+
+@dataclasses.dataclass
+class Shard:
+    """
+    Half-open time range [start, end) of crawl.
+    """
+    start: datetime.datetime
+    end: datetime.datetime
+
+    @property
+    def span(self) -> datetime.timedelta:
+        return self.end - self.start
+
+    def split(self, parts: int) -> list[Shard]:
+        step = self.span / parts
+        bounds = [self.start + step * i for i in range(parts)] + [self.end]
+        return [Shard(a, b) for a, b in zip(bounds, bounds[1:])]
+
+    def filter(self, field: str) -> str:
+        return f"{field} ge {self.__format(self.start)} and {field} lt {self.__format(self.end)}"
+
+    @staticmethod
+    def __format(date: datetime.datetime) -> str:
+        if date.tzinfo:
+            date = date.astimezone(datetime.timezone.utc)
+        return date.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class Crawl:
+    """
+    Harvests all products of time span without hitting $skip limit. Span is split into shards, every shard is counted
+    first and split further while it holds more products than can be paged through. Shards are fetched concurrently,
+    products are yielded in arrival order, each Id once.
+
+    @param client: Client sending requests
+    @param params: Query parameters of constructor, its $filter is combined with shard ranges and Id is added to its
+                   $select, products are told apart by it
+    @param start: Beginning of span, inclusive
+    @param end: End of span, exclusive
+    @param field: Date the span applies to, "ContentDate/Start" or "PublicationDate"
+    @param concurrency: Shards fetched at once
+    @param shards: Number of shards span is split into before counting
+    @param limit: Highest number of products fetched from single shard, denser shards are split
+    @param page: Products per request
+    @param min_span: Shards are not split below this length, excess products are then skipped with warning
+    """
+    __skip_limit: int = 10000
+
+    def __init__(self, client: Client, params: dict, start: datetime.datetime, end: datetime.datetime,
+                 field: typing.Literal["ContentDate/Start", "PublicationDate"] = "ContentDate/Start",
+                 concurrency: int = 4, shards: int = 1, limit: int = 10000, page: int = 1000,
+                 min_span: datetime.timedelta = datetime.timedelta(seconds=1)):
+        if not start < end:
+            raise ValueError(f"Crawl start {start} must be before end {end}")
+        if not 0 < page <= 1000:
+            raise errors.InvalidNumberError(page, [1, 1000])
+        self._client: Client = client
+        self._params: dict = {k: v for k, v in params.items() if k not in ("$top", "$skip", "$count", "$orderby")}
+        if self._params.get("$select") and "Id" not in self._params["$select"].split(","):
+            self._params["$select"] = f"Id,{self._params['$select']}"
+        self._start: datetime.datetime = start
+        self._end: datetime.datetime = end
+        self._field: str = field
+        self._concurrency: int = max(1, concurrency)
+        self._shards: int = max(1, shards)
+        self._limit: int = min(limit, self.__skip_limit + page)
+        self._page: int = page
+        self._min_span: datetime.timedelta = min_span
+
+        self.counted: int = 0
+        self.fetched: int = 0
+        self.duplicates: int = 0
+        self.truncated: int = 0
+
+    def __params(self, shard: Shard, **params) -> dict:
+        query = shard.filter(self._field)
+        if self._params.get("$filter"):
+            query = f"{self._params['$filter']} and ( {query} )"
+        return {**self._params, "$filter": query, **params}
+
+    async def __request(self, params: dict) -> dict:
+        url = self._client.http.url("Products")
+        response, data = await self._client.http.request("get", url, params=params)
+        if not response.ok:
+            raise errors.ODataHttpException(f"{url} answered {response.status} {response.reason}")
+        return data
+
+    async def __count(self, shard: Shard) -> int:
+        data = await self.__request(self.__params(shard, **{"$count": "true", "$top": 0}))
+        return int(data.get("@odata.count", 0))
+
+    async def __shard(self, shard: Shard, shards: asyncio.Queue, output: asyncio.Queue):
+        count = await self.__count(shard)
+        self.counted += 1
+        if count > self._limit and shard.span > self._min_span:
+            parts = min(16, max(2, math.ceil(count / self._limit) + 1))
+            logger.debug(f"Crawl shard {shard.start} - {shard.end} holds {count} products, split into {parts}")
+            for s in shard.split(parts):
+                shards.put_nowait(s)
+            return
+        if count > self._limit:
+            logger.warning(f"Crawl shard {shard.start} - {shard.end} holds {count} products, only {self._limit} "
+                           f"can be fetched")
+            self.truncated += count - self._limit
+
+        skip = 0
+        while skip < min(count, self._limit):
+            top = min(self._page, self._limit - skip)
+            params = {"$orderby": f"{self._field} asc", "$top": top}
+            if skip:
+                params.update({"$skip": skip})
+            page = (await self.__request(self.__params(shard, **params))).get("value", [])
+            self.fetched += len(page)
+            await output.put(page)
+            if len(page) < top:
+                break
+            skip += top
+
+    async def __worker(self, shards: asyncio.Queue, output: asyncio.Queue):
+        while True:
+            shard = await shards.get()
+            try:
+                await self.__shard(shard, shards, output)
+            except Exception as e:
+                await output.put(e)
+            finally:
+                shards.task_done()
+
+    async def __aiter__(self) -> typing.AsyncIterator[OProduct]:
+        shards: asyncio.Queue = asyncio.Queue()
+        output: asyncio.Queue = asyncio.Queue(maxsize=self._concurrency * 2)
+        for shard in Shard(self._start, self._end).split(self._shards):
+            shards.put_nowait(shard)
+
+        workers = [asyncio.ensure_future(self.__worker(shards, output)) for _ in range(self._concurrency)]
+
+        async def finish():
+            await shards.join()
+            await output.put(None)
+
+        supervisor = asyncio.ensure_future(finish())
+        seen: set[str] = set()
+        try:
+            while True:
+                page = await output.get()
+                if page is None:
+                    break
+                if isinstance(page, BaseException):
+                    raise page
+                for data in page:
+                    if data["Id"] in seen:
+                        self.duplicates += 1
+                        continue
+                    seen.add(data["Id"])
+                    yield OProduct(self._client, data)
+        finally:
+            for task in [supervisor, *workers]:
+                task.cancel()
+            for task in [supervisor, *workers]:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        logger.info(f"Crawl finished: {len(seen)} products from {self.counted} shards, {self.duplicates} duplicates")
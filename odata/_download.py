@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import dataclasses
+import hashlib
+import json
+import typing
+import logging
+import os
+import re
+import sys
+import time
+
+import aiohttp
+
+import odata.errors as errors
+from odata._limits import AdaptiveLimiter
+from odata._retry import RetryPolicy, CircuitBreaker
+from odata._writer import FileWriter
+from odata._tuning import ChunkTuner, ChunkProbe
+from odata._telemetry import TransferTelemetry
+
+if typing.TYPE_CHECKING:
+    from odata._scheduler import Bandwidth
+
+logger = logging.getLogger("odata.http")
+
+_content_range = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+@dataclasses.dataclass
+class Segment:
+    """
+    Byte range of downloaded file, both ends inclusive.
+
+    @var written: Number of bytes of range already stored
+    """
+    start: int
+    end: int
+    written: int = 0
+
+    @property
+    def offset(self) -> int:
+        return self.start + self.written
+
+    @property
+    def done(self) -> bool:
+        return self.offset > self.end
+
+    @property
+    def header(self) -> str:
+        return f"bytes={self.offset}-{self.end}"
+
+    @staticmethod
+    def split(size: int, count: int) -> list[Segment]:
+        count = max(1, min(count, size))
+        length = -(-size // count)
+        return [Segment(start, min(start + length, size) - 1) for start in range(0, size, length)]
+
+
+@dataclasses.dataclass
+class DownloadResult:
+    """
+    Outcome of finished download.
+
+    @var written: Bytes transferred by this download, without ranges resumed from previous attempt
+    @var checksums: Verification result per checksum algorithm, empty if nothing could be verified
+    @var telemetry: Timings, stalls and retries of transfer
+    @var cached: Archive was already in ArchiveStore, nothing was transferred
+    """
+    file: str
+    size: int
+    written: int
+    segmented: bool = False
+    resumed: int = 0
+    checksums: dict[str, bool] = dataclasses.field(default_factory=dict)
+    telemetry: typing.Optional[TransferTelemetry] = None
+    cached: bool = False
+
+    @property
+    def verified(self) -> bool:
+        return bool(self.checksums) and all(self.checksums.values())
+
+
+class Digest:
+    """
+    Running checksums of downloaded file for algorithms listed in product Checksum field, e.g.
+    [{"Algorithm": "MD5", "Value": "..."}]. Algorithms not available in hashlib are skipped.
+
+    Data is hashed in file order - directly from stream with update, or read back from file with follow when ranges
+    arrive out of order.
+    """
+    __block: int = 4 * 1024 * 1024
+    __algorithms: dict[str, str] = {
+        "sha-1": "sha1", "sha-224": "sha224", "sha-256": "sha256", "sha-384": "sha384", "sha-512": "sha512",
+        "sha3-224": "sha3_224", "sha3-256": "sha3_256", "sha3-384": "sha3_384", "sha3-512": "sha3_512",
+    }
+
+    def __init__(self, checksums: list[dict]):
+        self.expected: dict[str, str] = {}
+        self.hashes: dict[str, typing.Any] = {}
+        self.position: int = 0
+
+        for checksum in checksums or []:
+            algorithm = str(checksum.get("Algorithm", "")).lower()
+            algorithm = self.__algorithms.get(algorithm, algorithm)
+            value = checksum.get("Value")
+            if not value:
+                continue
+            try:
+                self.hashes[algorithm] = hashlib.new(algorithm)
+            except ValueError:
+                logger.debug(f"Checksum algorithm {checksum.get('Algorithm')} not supported, skipping")
+                continue
+            self.expected[algorithm] = value.lower()
+
+    def __bool__(self) -> bool:
+        return bool(self.hashes)
+
+    def update(self, data: bytes):
+        for h in self.hashes.values():
+            h.update(data)
+        self.position += len(data)
+
+    def follow(self, path: str, end: int):
+        """ Hashes file content between current position and end. Blocking, meant to run in executor. """
+        if end <= self.position:
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            while self.position < end:
+                data = os.pread(fd, min(self.__block, end - self.position), self.position)
+                if not data:
+                    break
+                self.update(data)
+        finally:
+            os.close(fd)
+
+    def verify(self, file: str) -> dict[str, bool]:
+        """
+        Compares computed checksums with expected.
+
+        @return: Result per algorithm
+        @raise errors.ChecksumMismatchError: On first mismatching algorithm
+        """
+        result = {}
+        for algorithm, h in self.hashes.items():
+            computed = h.hexdigest()
+            result[algorithm] = computed == self.expected[algorithm]
+            if not result[algorithm]:
+                raise errors.ChecksumMismatchError(file, algorithm, self.expected[algorithm], computed)
+        return result
+
+
+class PartialState:
+    """
+    On-disk state of unfinished transfer. Data is written to '{file}.part' and ranges completed so far are recorded
+    in '{file}.part.json' sidecar, so interrupted transfer of the same url can be resumed.
+    """
+    __interval: float = 1.0
+
+    def __init__(self, file: str, url: str):
+        self.file: str = file
+        self.path: str = f"{file}.part"
+        self.sidecar: str = f"{file}.part.json"
+        self.url: str = url
+
+        self.size: int = 0
+        self.segments: list[Segment] = []
+
+        self.__saved: float = 0.0
+
+    def load(self) -> bool:
+        """
+        Reads sidecar of previous transfer.
+
+        @return: True if previous transfer of the same url can be continued
+        """
+        if not (os.path.isfile(self.path) and os.path.isfile(self.sidecar)):
+            return False
+        try:
+            with open(self.sidecar) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("url") != self.url or not data.get("size"):
+            return False
+        self.size = data["size"]
+        self.segments = [Segment(*s) for s in data.get("segments", [])]
+        return bool(self.segments)
+
+    @property
+    def written(self) -> int:
+        return sum(segment.written for segment in self.segments)
+
+    def reset(self, size: int, segments: list[Segment]):
+        self.size = size
+        self.segments = segments
+        self.save()
+
+    def save(self):
+        if not self.size:
+            return
+        data = {
+            "url": self.url,
+            "size": self.size,
+            "segments": [[s.start, s.end, s.written] for s in self.segments]
+        }
+        with open(f"{self.sidecar}.tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(f"{self.sidecar}.tmp", self.sidecar)
+        self.__saved = time.monotonic()
+
+    def touch(self):
+        """ Saves sidecar if it was not saved recently. """
+        if time.monotonic() - self.__saved > self.__interval:
+            self.save()
+
+    def complete(self):
+        """ Atomically moves complete data to target file and removes sidecar. """
+        os.replace(self.path, self.file)
+        self.discard()
+
+    def discard(self):
+        for path in (self.sidecar, f"{self.sidecar}.tmp"):
+            if os.path.isfile(path):
+                os.remove(path)
+        self.size = 0
+        self.segments = []
+
+
+class Transfer:
+    """
+    Single product transfer from resolved (post redirect) location to file.
+
+    With segments higher than 1 file is split into byte ranges fetched concurrently and written at their offsets by
+    FileWriter.
+    Servers ignoring Range header are streamed over single connection instead. Data is kept in PartialState until
+    transfer is complete, unfinished transfer of the same url is resumed from ranges recorded there.
+
+    Provided checksums are computed while data arrives; out of order ranges are hashed by reading back the written
+    prefix on a separate thread, so the event loop is not blocked.
+    """
+    __follow_step: int = 16 * 1024 * 1024
+
+    def __init__(self, session: aiohttp.ClientSession, url: str, location: str, file: str, headers: dict[str, str],
+                 timeout: aiohttp.ClientTimeout, chunks: typing.Union[int, typing.Literal["auto"], None] = None,
+                 segments: int = 1,
+                 resume: bool = True, checksums: typing.Optional[list[dict]] = None,
+                 progress: typing.Optional[typing.Callable[[int], None]] = None,
+                 bandwidth: typing.Optional[Bandwidth] = None, limiter: typing.Optional[AdaptiveLimiter] = None,
+                 retry: typing.Optional[RetryPolicy] = None, breaker: typing.Optional[CircuitBreaker] = None,
+                 tuner: typing.Optional[ChunkTuner] = None, telemetry: typing.Optional[TransferTelemetry] = None):
+        self._session: aiohttp.ClientSession = session
+        self._location: str = location
+        self._file: str = file
+        self._headers: dict[str, str] = headers
+        self._timeout: aiohttp.ClientTimeout = timeout
+        self._chunks: typing.Union[int, typing.Literal["auto"], None] = chunks
+        self._segments: int = max(1, segments)
+        self._retry: RetryPolicy = retry or RetryPolicy()
+        self._breaker: CircuitBreaker = breaker or CircuitBreaker(self._retry)
+        self._tuner: ChunkTuner = tuner or ChunkTuner()
+        self._telemetry: TransferTelemetry = telemetry or TransferTelemetry(url, file)
+        self._progress: typing.Optional[typing.Callable[[int], None]] = progress
+        self._bandwidth: typing.Optional[Bandwidth] = bandwidth
+        self._limiter: AdaptiveLimiter = limiter or AdaptiveLimiter()
+
+        self.state: PartialState = PartialState(file, url)
+        self.digest: Digest = Digest(checksums)
+        self.size: int = 0
+        self.segmented: bool = False
+        self.resumed: int = 0
+        self.checksums: dict[str, bool] = {}
+
+        self.__hashing: typing.Optional[asyncio.Future] = None
+        self.__hasher: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.__probes: list[ChunkProbe] = []
+
+        if not resume:
+            self.state.discard()
+
+    async def run(self) -> int:
+        """
+        Fetches location to file.
+
+        @return: Number of bytes stored by this transfer
+        @raise errors.ChecksumMismatchError: If stored file does not match any of checksums
+        """
+        try:
+            return await self.__run()
+        finally:
+            self._tuner.record(self.__probes)
+
+    async def __run(self) -> int:
+        resumable = self.state.load()
+
+        if not resumable and self._segments == 1:
+            async with self._get() as response:
+                return await self.__stream(response)
+
+        async with self._get(headers={"Range": "bytes=0-0"}) as probe:
+            total = self.__total(probe)
+            if total is None:
+                logger.debug(f"File: '{self._file}' - ranges not supported by {probe.url.host}, single stream")
+                self.state.discard()
+                if probe.status == 200:
+                    return await self.__stream(probe)
+            await probe.read()
+
+        if total is None:
+            async with self._get() as response:
+                return await self.__stream(response)
+
+        self.size = total
+        if resumable and total == self.state.size:
+            self.resumed = self.state.written
+            logger.debug(f"File: '{self._file}' - resuming at {self.resumed / 1000000:.3f} MB")
+        else:
+            self.state.reset(total, Segment.split(total, self._segments))
+
+        self.segmented = len(self.state.segments) > 1
+        return await self.__segmented() - self.resumed
+
+    @contextlib.asynccontextmanager
+    async def _get(self, headers: typing.Optional[dict] = None) -> typing.AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Opens response of location. Connection failures and retry statuses are retried before any data is yielded.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            with self._breaker.admit(self._location):
+                async with self._limiter.slot(self._location) as slot:
+                    try:
+                        response = await self._session.get(self._location, headers={**self._headers, **(headers or {})},
+                                                           allow_redirects=False, timeout=self._timeout,
+                                                           read_bufsize=self.__bufsize)
+                    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                        self._breaker.failure(self._location)
+                        if attempt >= self._retry.attempts:
+                            raise
+                        reason, delay = e.__class__.__name__, self._retry.delay(attempt)
+                    else:
+                        slot.received(response.status)
+                        if response.status not in self._retry.statuses or attempt >= self._retry.attempts:
+                            try:
+                                if response.status in self._retry.statuses:
+                                    self._breaker.failure(self._location)
+                                else:
+                                    self._breaker.success(self._location)
+                                response.raise_for_status()
+                                yield response
+                            finally:
+                                response.release()
+                            return
+                        self._breaker.failure(self._location)
+                        reason, delay = f"{response.status} {response.reason}", self._retry.delay(attempt,
+                                                                                                   response.headers)
+                        response.release()
+            logger.debug(f"File: '{self._file}' - {reason}, retry {attempt}/{self._retry.attempts - 1} "
+                         f"in {delay:.2f}s")
+            self._telemetry.retry()
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def __total(response: aiohttp.ClientResponse) -> typing.Optional[int]:
+        if response.status != 206:
+            return None
+        match = _content_range.fullmatch(response.headers.get("Content-Range", ""))
+        if not match or match.group(3) == "*":
+            return None
+        return int(match.group(3))
+
+    @property
+    def __bufsize(self) -> typing.Optional[int]:
+        """ Tuned reads are bounded by response buffer, session default is kept otherwise. """
+        return self._tuner.buffer if self._chunks == "auto" else None
+
+    def _iter(self, response: aiohttp.ClientResponse) -> typing.AsyncIterator[bytes]:
+        if self._chunks == "auto":
+            return self.__tuned(response)
+        if self._chunks:
+            return response.content.iter_chunked(self._chunks)
+        return response.content.iter_any()
+
+    async def __tuned(self, response: aiohttp.ClientResponse) -> typing.AsyncIterator[bytes]:
+        probe = self._tuner.probe(response.url.host or "")
+        self.__probes.append(probe)
+        while True:
+            c = await response.content.read(probe.size)
+            if not c:
+                break
+            probe.update(len(c))
+            yield c
+
+    def __open(self, truncate: bool = False) -> FileWriter:
+        return FileWriter(self.state.path, self.size, truncate=truncate)
+
+    async def __stream(self, response: aiohttp.ClientResponse) -> int:
+        self.size = response.content_length or 0
+        segment = Segment(0, self.size - 1 if self.size else sys.maxsize)
+        if self.size:
+            self.state.reset(self.size, [segment])
+
+        writer = self.__open(truncate=True)
+        try:
+            await self.__receive(writer, response, segment)
+        finally:
+            await writer.close()
+            self.state.save()
+
+        if self.size and not segment.done:
+            raise aiohttp.ClientPayloadError(f"Transfer of '{self._file}' ended at {segment.offset} of {self.size}")
+        self.__verify()
+        self.state.complete()
+        return segment.written
+
+    async def __segmented(self) -> int:
+        writer = self.__open()
+        if self.digest:
+            self.__hasher = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="odata-digest")
+        try:
+            tasks = [asyncio.ensure_future(self.__segment(writer, segment)) for segment in self.state.segments
+                     if not segment.done]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            if self.digest:
+                await self.__drain()
+        finally:
+            await writer.close()
+            self.state.save()
+            if self.__hasher:
+                self.__hasher.shutdown(wait=False)
+        written = self.state.written
+        self.__verify()
+        self.state.complete()
+        return written
+
+    def __prefix(self) -> int:
+        """ End of contiguous range written from the file start. """
+        for segment in sorted(self.state.segments, key=lambda s: s.start):
+            if not segment.done:
+                return segment.offset
+        return self.size
+
+    def __follow(self):
+        """ Schedules hashing of newly completed prefix, unless previous step is still running. """
+        if self.__hashing and not self.__hashing.done():
+            return
+        end = self.__prefix()
+        if end - self.digest.position >= self.__follow_step or (end == self.size and end > self.digest.position):
+            self.__hashing = asyncio.get_running_loop().run_in_executor(self.__hasher, self.digest.follow,
+                                                                        self.state.path, end)
+
+    async def __drain(self):
+        """ Waits for running hashing step and hashes remaining part of file. """
+        if self.__hashing:
+            await self.__hashing
+        await asyncio.get_running_loop().run_in_executor(self.__hasher, self.digest.follow, self.state.path, self.size)
+
+    def __verify(self):
+        if not self.digest:
+            return
+        try:
+            self.checksums = self.digest.verify(self._file)
+        except errors.ChecksumMismatchError:
+            logger.error(f"File: '{self._file}' - checksum mismatch, partial data discarded")
+            self.state.discard()
+            os.remove(self.state.path)
+            raise
+        logger.debug(f"File: '{self._file}' - checksum verified: {', '.join(self.checksums)}")
+
+    async def __segment(self, writer: FileWriter, segment: Segment):
+        attempt = 0
+        while not segment.done:
+            try:
+                async with self._get(headers={"Range": segment.header}) as response:
+                    if response.status != 206:
+                        raise aiohttp.ClientPayloadError(f"Range {segment.header} answered with {response.status}")
+                    await self.__receive(writer, response, segment)
+            except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                attempt += 1
+                if attempt >= self._retry.attempts:
+                    raise
+                delay = self._retry.delay(attempt)
+                logger.debug(f"File: '{self._file}' - segment {segment.start}-{segment.end} failed at "
+                             f"{segment.offset} ({e.__class__.__name__}), retry {attempt}/{self._retry.attempts - 1} "
+                             f"in {delay:.2f}s")
+                self._telemetry.retry()
+                await asyncio.sleep(delay)
+
+    async def __receive(self, writer: FileWriter, response: aiohttp.ClientResponse, segment: Segment):
+        def written(amount: int):
+            segment.written += amount
+            self.state.touch()
+            if self.__hasher is not None:
+                self.__follow()
+
+        stream = writer.stream(segment.offset, written)
+        remaining = segment.end + 1 - segment.offset
+        try:
+            async for c in self._iter(response):
+                c = c[:remaining]
+                remaining -= len(c)
+                await stream.write(c)
+                self._telemetry.receive(len(c))
+                if self.__hasher is None:
+                    self.digest.update(c)
+                if self._progress:
+                    self._progress(len(c))
+                if self._bandwidth:
+                    await self._bandwidth.consume(len(c))
+                if remaining <= 0:
+                    break
+        finally:
+            await stream.flush()
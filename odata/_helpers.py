@@ -1,28 +1,82 @@
+from __future__ import annotations
+
 import datetime
+import re
+import sys
+import typing
+
+if typing.TYPE_CHECKING:
+    import numpy
 
 
 class TimeConverter:
     __format: str = "%Y-%m-%dT%H:%M:%SZ"
-    __mili_format: str = "%Y-%m-%dT%H:%M:%S.%fZ"
+    __fraction: re.Pattern = re.compile(r"\.(\d+)")
+    __extended: bool = sys.version_info >= (3, 11)  # fromisoformat accepts any ISO 8601 since 3.11
 
     @staticmethod
     def to_date(time: str) -> datetime.datetime:
+        """
+        Parses ISO 8601 date of API, with or without fraction of second and zone designator.
+
+        @return: Timezone aware date, UTC if time has no offset. Current time if time is empty
+        """
+        if not time:
+            return datetime.datetime.now(datetime.timezone.utc)
+        if time[-1] in "Zz":
+            time = f"{time[:-1]}+00:00"
+        if not TimeConverter.__extended:
+            time = TimeConverter.__fraction.sub(lambda m: f".{m.group(1)[:6]:0<6}", time, count=1)
+        date = datetime.datetime.fromisoformat(time)
+        return date if date.tzinfo else date.replace(tzinfo=datetime.timezone.utc)
+
+    @staticmethod
+    def to_datetime64(times: typing.Iterable[typing.Optional[str]], unit: str = "ms") -> numpy.ndarray:
+        """
+        Parses many ISO 8601 dates at once into naive UTC datetime64 array, NaT where time is empty.
+
+        @raise ImportError: If numpy is not installed
+        """
+        import numpy
+
+        return numpy.array([TimeConverter.__utc(t) for t in times], dtype=f"datetime64[{unit}]")
+
+    @staticmethod
+    def __utc(time: typing.Optional[str]) -> str:
+        """ numpy parses only dates without zone designator, offsets other than UTC are converted. """
         if not time:
-            return datetime.datetime.now()
-        try:
-            return datetime.datetime.strptime(time, TimeConverter.__format)
-        except ValueError:
-            return datetime.datetime.strptime(time, TimeConverter.__mili_format)
-        except Exception as e:
-            raise e
+            return "NaT"
+        if time[-1] in "Zz":
+            return time[:-1]
+        if len(time) > 19 and time[-6] in "+-" and time[-3] == ":":
+            return TimeConverter.to_date(time).astimezone(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+        return time
 
     @staticmethod
     def to_str(time: datetime.datetime) -> str:
+        """
+        Formats date for API filters, aware dates are converted to UTC, naive ones are taken as UTC.
+        """
         if not time:
-            return datetime.datetime.now().strftime(TimeConverter.__format)
-        try:
-            return time.strftime(TimeConverter.__format)
-        except ValueError:
-            return time.strftime(TimeConverter.__mili_format)
-        except Exception as e:
-            raise e
+            return datetime.datetime.now(datetime.timezone.utc).strftime(TimeConverter.__format)
+        if time.tzinfo:
+            time = time.astimezone(datetime.timezone.utc)
+        return time.strftime(TimeConverter.__format)
+
+
+class GeoJson:
+    @staticmethod
+    def bounds(geometry: typing.Optional[dict]) -> typing.Optional[tuple[float, float, float, float]]:
+        """
+        Bounding box of Polygon or MultiPolygon over vertices of all its polygons and rings.
+
+        @return: Minimum x, minimum y, maximum x and maximum y, None if geometry has no vertices
+        """
+        if not geometry or not geometry.get("coordinates"):
+            return None
+        polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+        points = [p for polygon in polygons for ring in polygon for p in ring]
+        if not points:
+            return None
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        return min(xs), min(ys), max(xs), max(ys)
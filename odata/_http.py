@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import dataclasses
 import datetime
 import math
@@ -9,16 +10,24 @@ import logging
 import pyotp
 import aiohttp
 from aiohttp import web
-import aiofiles
 import os
 from pathlib import Path
+from urllib.parse import urlsplit
 
 
 if typing.TYPE_CHECKING:
     from odata.client import Client
+    from odata._scheduler import Bandwidth
 
 
 import odata.errors as errors
+from odata._download import Transfer, DownloadResult
+from odata._limits import AdaptiveLimiter, LimitOptions
+from odata._retry import RetryPolicy, CircuitBreaker
+from odata._tuning import ChunkTuner
+from odata._telemetry import TransferTelemetry
+from odata._cache import CacheOptions, ResponseCache
+from odata._json import Decoder, DecoderName, ValueParser, decoder as json_decoder
 
 logger = logging.getLogger("odata.http")
 
@@ -67,7 +76,7 @@ class RefreshToken:
         self.value = value
         self.expires: datetime.datetime = datetime.datetime.now() + datetime.timedelta(0, expires)
 
-    def __nonzero__(self) -> bool:
+    def __bool__(self) -> bool:
         return datetime.datetime.now() < self.expires
 
     def __str__(self):
@@ -98,6 +107,8 @@ class Token:
 
         totp = Totp(totp_key=totp_key, totp_code=totp_code)
         self.__credentials: Credentials = Credentials(email, password, platform, totp)
+        self.http: typing.Optional[Http] = None
+        self.__renewal: typing.Optional[asyncio.Future] = None
         self.__token, self.expires, self.__refresh_token = asyncio.run(self.__get())
         self.__loop = loop or asyncio.new_event_loop()
 
@@ -112,19 +123,33 @@ class Token:
 
     @property
     async def value(self) -> str:
-        if not datetime.datetime.now() < self.expires and self.__refresh_token:
-            await self.__refresh()
-        elif not datetime.datetime.now() < self.expires or not self.__refresh_token:
-            await self.__get()
+        """ Current access token, renewed first if it expired. Concurrent callers wait for single renewal. """
+        if not datetime.datetime.now() < self.expires or not self.__refresh_token:
+            await self.__renew()
         return self.__token
 
+    async def __renew(self):
+        """ Refreshes token, or authenticates again once refresh token expired. Runs once at a time. """
+        if self.__renewal is None:
+            self.__renewal = asyncio.ensure_future(self.__refresh() if self.__refresh_token else self.__authenticate())
+            self.__renewal.add_done_callback(self.__renewed)
+        await asyncio.shield(self.__renewal)
+
+    def __renewed(self, renewal: asyncio.Future):
+        self.__renewal = None
+        if not renewal.cancelled():
+            renewal.exception()
+
+    async def __authenticate(self):
+        self.__token, self.expires, self.__refresh_token = await self.__get()
+
     async def __alive(self):
         start = datetime.datetime.now()
         try:
             while True:
                 await asyncio.sleep(self.__seconds_to(self.expires))
                 if self.__keep_alive:
-                    await self.__refresh()
+                    await self.__renew()
                     logger.debug(f"Token for {self.__credentials.email} refreshed. Valid for {self.__seconds_to(self.expires)}s")
         except asyncio.CancelledError:
             logger.debug(f"Token refresh interval interrupted after {(datetime.datetime.now() - start).total_seconds()}s of runtime; "
@@ -139,17 +164,29 @@ class Token:
         if not self.alive.cancelled():
             self.alive.cancel()
 
-    async def __refresh(self):
+    @contextlib.asynccontextmanager
+    async def __session(self) -> typing.AsyncIterator[aiohttp.ClientSession]:
+        """
+        Yields pooled session of attached Http. Before Http is attached (first authentication runs in a separate
+        loop) a short-lived session is used instead.
+        """
+        if self.http is not None:
+            yield self.http.session
+            return
         async with aiohttp.ClientSession() as session:
-            data = {
-                "client_id": self.__credentials.client_id,
-                "grant_type": "refresh_token",
-                "refresh_token": self.__refresh_token
-            }
-            response = await session.post(url=self.__credentials.url, data=data)
-        if not response.ok:
-            raise errors.AuthenticationFailed(response.status, response.reason)
-        result = await response.json()
+            yield session
+
+    async def __refresh(self):
+        data = {
+            "client_id": self.__credentials.client_id,
+            "grant_type": "refresh_token",
+            "refresh_token": str(self.__refresh_token)
+        }
+        async with self.__session() as session:
+            async with session.post(url=self.__credentials.url, data=data) as response:
+                if not response.ok:
+                    raise errors.AuthenticationFailed(response.status, response.reason)
+                result = await response.json()
 
         self.__token = result["access_token"]
         self.expires = datetime.datetime.now() + datetime.timedelta(0, result["expires_in"])
@@ -158,16 +195,14 @@ class Token:
         return
 
     async def __get(self) -> [str, datetime.datetime, typing.Optional[RefreshToken]]:
-        async with aiohttp.ClientSession() as session:
-            data = {
-                "client_id": self.__credentials.client_id,
-                "username": self.__credentials.email,
-                "password": self.__credentials.password,
-                "grant_type": "password",
-                "totp": self.__credentials.totp
-            }
-            print(data)
-
+        data = {
+            "client_id": self.__credentials.client_id,
+            "username": self.__credentials.email,
+            "password": self.__credentials.password,
+            "grant_type": "password",
+            "totp": str(self.__credentials.totp)
+        }
+        async with self.__session() as session:
             async with session.post(self.__credentials.url, data=data) as response:
 
                 logger.debug(f"Authentication request to {response.url}")
@@ -180,7 +215,6 @@ class Token:
                     RefreshToken(data["refresh_token"], data["refresh_expires_in"])
                 ]
                 return values
-        return "", datetime.datetime.now(), None
 
     @staticmethod
     async def __exceptions(function):
@@ -216,12 +250,87 @@ timeout = aiohttp.ClientTimeout(
 )
 
 
+@dataclasses.dataclass
+class PoolOptions:
+    """
+    Connection pool configuration of shared Http session.
+
+    @var limit: Total number of simultaneous connections
+    @var limit_per_host: Number of simultaneous connections to single host
+    @var keepalive_timeout: Seconds idle connection is kept open for reuse
+    @var ttl_dns_cache: Seconds resolved addresses are cached, None caches forever
+    """
+    limit: int = 100
+    limit_per_host: int = 10
+    keepalive_timeout: float = 30
+    ttl_dns_cache: typing.Optional[int] = 300
+
+    def bound(self, limits: LimitOptions) -> LimitOptions:
+        """
+        Limits capped at limit_per_host, requests above it would wait for connection and the wait would be measured
+        as time to first byte.
+        """
+        if not self.limit_per_host or limits.maximum <= self.limit_per_host:
+            return limits
+        maximum = self.limit_per_host
+        return dataclasses.replace(limits, maximum=maximum, initial=min(limits.initial, maximum),
+                                   minimum=min(limits.minimum, maximum))
+
+    def connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                    keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=self.ttl_dns_cache)
+
+
 class Http:
-    def __init__(self, token, source, download_directory: str = ""):
+    __stream_chunk: int = 64 * 1024
+
+    def __init__(self, token, source, download_directory: str = "", pool: typing.Optional[PoolOptions] = None,
+                 limits: typing.Optional[LimitOptions] = None, retry: typing.Optional[RetryPolicy] = None,
+                 decoder: typing.Union[DecoderName, Decoder] = "auto", cache: typing.Optional[CacheOptions] = None):
         self.__token: Token = token
         self.__source: str = source
         self.__download_directory: str = download_directory or os.getcwd()
 
+        self.__pool: PoolOptions = pool or PoolOptions()
+        self.__session: typing.Optional[aiohttp.ClientSession] = None
+        self.limiter: AdaptiveLimiter = AdaptiveLimiter(self.__pool.bound(limits or LimitOptions()))
+        self.retry: RetryPolicy = retry or RetryPolicy()
+        self.breaker: CircuitBreaker = CircuitBreaker(self.retry)
+        self.tuner: ChunkTuner = ChunkTuner(ChunkTuner.default_path())
+        self.decode: Decoder = json_decoder(decoder)
+        self.cache: typing.Optional[ResponseCache] = ResponseCache(cache) if cache else None
+        self.coalesced: int = 0
+
+        self.__flights: dict[str, asyncio.Future] = {}
+
+        self.on_transfer: typing.Optional[typing.Callable[[TransferTelemetry], None]] = None
+        self.telemetry_interval: float = 1.0
+
+        self.__token.http = self
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Shared session, created on first use within running loop. Connections are kept alive and reused between
+        catalogue, download and authentication calls.
+        """
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(connector=self.__pool.connector())
+        return self.__session
+
+    @property
+    def limits(self) -> dict[str, dict[str, float]]:
+        """ Current adaptive concurrency limit of every host, see AdaptiveLimiter.limits """
+        return self.limiter.limits
+
+    async def close(self):
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+
+    async def __headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {await self.__token.value}"}
+
     def url(self, endpoint: str) -> str:
         api_urls = {
             "creodias": "https://datahub.creodias.eu/odata/v1/",
@@ -232,41 +341,249 @@ class Http:
         return f"{api_urls[self.__source]}{endpoint}"
 
     async def request(self, method: str, url: str, **kwargs) -> [dict, aiohttp.ClientResponse]:
-        async with aiohttp.ClientSession() as session:
-            session.headers["__keycloak"] = f"Bearer {await self.__token.value}"
-            async with session.request(method, url, **kwargs) as response:
-
-                logger.debug(f"{response.method} {response.status} - {response.url}")
+        """
+        Sends request to url, idempotent methods are retried according to retry policy.
+
+        Concurrent identical GET requests without body share single request in flight, their callers receive the same
+        response and decoded body, which should not be modified. Successful GET responses are served from cache
+        within its TTL if cache is enabled.
+
+        @return: Response and its decoded JSON body, empty dict if body of failed response is not JSON
+        @raise errors.CircuitOpenError: If url host keeps failing
+        """
+        if method.upper() != "GET" or kwargs.get("data") or kwargs.get("json"):
+            return await self.__retrying(method, url, lambda: self.__send(method, url, **kwargs))
+
+        key = ResponseCache.key(url, kwargs.get("params"))
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                response, body = cached
+                logger.debug(f"{response.method} {response.status} - {response.url} (cached)")
+                return response, self.decode(body) if body.strip() else None
+
+        flight = self.__flights.get(key)
+        if flight is None:
+            cache = None
+            if self.cache is not None:
+                cache = key
+                self.cache.misses += 1
+            flight = asyncio.ensure_future(self.__retrying(method, url,
+                                                           lambda: self.__send(method, url, cache=cache, **kwargs)))
+            flight.add_done_callback(lambda f: self.__landed(key, f))
+            self.__flights[key] = flight
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    def __landed(self, key: str, flight: asyncio.Future):
+        """ Request of flight is sent again by next caller, its error is retrieved even if all callers left. """
+        if self.__flights.get(key) is flight:
+            del self.__flights[key]
+        if not flight.cancelled():
+            flight.exception()
+
+    async def items(self, method: str, url: str, envelope: typing.Optional[dict] = None,
+                    **kwargs) -> typing.AsyncIterator[typing.Any]:
+        """
+        Sends request to url and decodes "value" array of JSON response incrementally while body arrives, so only
+        single item is held decoded at once. Request is retried as in request, but not once body is being read.
+
+        @param envelope: Filled with other members of response, e.g. "@odata.nextLink", once iteration ends
+        @return: Items of "value" array
+        @raise errors.ODataHttpException: If response status is not successful
+        @raise ValueError: If response body is not valid JSON
+        """
+        async def send() -> tuple[aiohttp.ClientResponse, typing.Any]:
+            headers = await self.__headers()
+            async with self.limiter.slot(url) as slot:
+                response = await self.session.request(method, url, headers=headers, **kwargs)
+                slot.received(response.status)
+            logger.debug(f"{response.method} {response.status} - {response.url}")
+            if response.ok:
+                return response, None
+            response.release()
+            if response.status in (401, 403):
+                raise errors.UnauthorizedError(response.status, response.reason)
+            return response, None
+
+        response, _ = await self.__retrying(method, url, send)
+        if not response.ok:
+            raise errors.ODataHttpException(f"{url} answered {response.status} {response.reason}")
 
-                if not response.ok:
-                    logger.debug(f"Endpoint for {url} returned {response.status} - {response.reason}")
-
-                if response.status in (401, 403):
-                    raise errors.UnauthorizedError(response.status, response.reason)
-
-                return response, await response.json()
-
-    async def download(self, url: str, file: str, chunks: typing.Optional[int] = None, **kwargs):
-        async with aiohttp.ClientSession(headers={"Authorization": f"Bearer {await self.__token.value}"}, raise_for_status=True) as session:
-            start: datetime.datetime = datetime.datetime.now()
-            async with session.get(url, allow_redirects=False, timeout=timeout, **kwargs) as response:
-                logger.debug(f"{response.method} {response.status} - {response.url}")
-                location = response.headers["Location"]
-
-            async with session.get(location, allow_redirects=False, timeout=timeout) as product:
-                logger.debug(f"{product.method} {product.status} - {product.url}")
-                size = (product.content_length / 1000000)
-                logger.debug(f"File: '{file}' - {'overwrite' if Path(file).is_file() else 'new'}:  {size:.3f} MB ")
-                async with aiofiles.open(file, 'wb') as f:
-                    if chunks:
-                        async for c in product.content.iter_chunked(chunks):
-                            await f.write(c)
-                    else:
-                        async for c, _ in product.content.iter_chunks():
-                            await f.write(c)
-            span = (datetime.datetime.now() - start).total_seconds()
-            throughput = size / span
-            logger.debug(f"File: '{file}' - complete: {span:.2f}s {throughput:.4f} MB/s")
+        parser = ValueParser()
+        try:
+            async for chunk in response.content.iter_chunked(self.__stream_chunk):
+                for item in parser.feed(chunk):
+                    yield item
+            for item in parser.feed(b"", final=True):
+                yield item
+        finally:
+            response.release()
+        if envelope is not None:
+            envelope.update(parser.envelope)
+
+    async def __send(self, method: str, url: str, cache: typing.Optional[str] = None,
+                     **kwargs) -> [dict, aiohttp.ClientResponse]:
+        headers = await self.__headers()
+        async with self.limiter.slot(url) as slot, self.session.request(method, url, headers=headers,
+                                                                         **kwargs) as response:
+            slot.received(response.status)
+            logger.debug(f"{response.method} {response.status} - {response.url}")
+
+            if not response.ok:
+                logger.debug(f"Endpoint for {url} returned {response.status} - {response.reason}")
+
+            if response.status in (401, 403):
+                raise errors.UnauthorizedError(response.status, response.reason)
+
+            body = await response.read()
+            if response.ok:
+                data = self.decode(body) if body.strip() else None
+                if cache is not None:
+                    self.cache.put(cache, response, body)
+                return response, data
+            try:
+                return response, self.decode(body)
+            except ValueError:
+                return response, {}
+
+    async def __retrying(self, method: str, url: str,
+                         send: typing.Callable[[], typing.Awaitable[tuple[aiohttp.ClientResponse, typing.Any]]],
+                         telemetry: typing.Optional[TransferTelemetry] = None
+                         ) -> tuple[aiohttp.ClientResponse, typing.Any]:
+        """
+        Calls send until its response is not in retry statuses, connection fails for good or attempts run out.
+        Every outcome is reported to circuit breaker of url host.
+        """
+        retries = self.retry.retries(method)
+        attempt = 0
+        while True:
+            attempt += 1
+            with self.breaker.admit(url):
+                try:
+                    result = await send()
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    self.breaker.failure(url)
+                    if not retries or attempt >= self.retry.attempts:
+                        raise
+                    reason, delay = e.__class__.__name__, self.retry.delay(attempt)
+                else:
+                    response = result[0]
+                    if response.status not in self.retry.statuses:
+                        self.breaker.success(url)
+                        return result
+                    self.breaker.failure(url)
+                    if not retries or attempt >= self.retry.attempts:
+                        return result
+                    reason, delay = f"{response.status} {response.reason}", self.retry.delay(attempt,
+                                                                                               response.headers)
+            logger.debug(f"{method.upper()} {url} - {reason}, retry {attempt}/{self.retry.attempts - 1} "
+                         f"in {delay:.2f}s")
+            if telemetry:
+                telemetry.retry()
+            await asyncio.sleep(delay)
+
+    async def download(self, url: str, file: str, chunks: typing.Union[int, typing.Literal["auto"], None] = None,
+                       segments: int = 1,
+                       resume: bool = True, checksums: typing.Optional[list[dict]] = None,
+                       progress: typing.Optional[typing.Callable[[int], None]] = None,
+                       bandwidth: typing.Optional[Bandwidth] = None, location: typing.Optional[str] = None,
+                       **kwargs) -> DownloadResult:
+        """
+        Downloads file following redirect of url. File is written under '.part' name and moved in place only when
+        complete; interrupted download of the same url is resumed.
+
+        @param url: Url answering with redirect to file location
+        @param file: Path of file to write
+        @param chunks: Size of read chunks in bytes, by default chunks are read as they arrive. With "auto" read size
+                       is tuned while data arrives, starting from the last size found best for the host
+        @param segments: Number of byte ranges fetched concurrently. Single stream is used if server ignores ranges.
+        @param resume: Continue unfinished download of the same url, if False previous progress is discarded
+        @param checksums: Product checksums in catalogue format, verified while file is written
+        @param progress: Called with number of bytes of every received chunk
+        @param bandwidth: Shared throughput cap the transfer consumes from
+        @param location: File location url redirects to, when already resolved with locate redirect is not requested
+        @return: Summary of download with checksum verification results and transfer telemetry. While download runs
+                 its telemetry is passed to on_transfer callback every telemetry_interval seconds and once at the end
+        @raise errors.ChecksumMismatchError: If downloaded file does not match checksum
+        @raise errors.CircuitOpenError: If catalogue or download host keeps failing
+        """
+        headers = await self.__headers()
+        telemetry = TransferTelemetry(url, file)
+        reporter = asyncio.ensure_future(self.__report(telemetry)) if self.on_transfer else None
+        try:
+            result = await self.__download(url, file, headers, telemetry, chunks=chunks, segments=segments,
+                                           resume=resume, checksums=checksums, progress=progress,
+                                           bandwidth=bandwidth, location=location, **kwargs)
+        except BaseException as e:
+            telemetry.finish(e)
+            raise
+        else:
+            telemetry.finish()
+        finally:
+            if reporter:
+                reporter.cancel()
+                self.__emit(telemetry)
+
+        logger.debug(f"File: '{file}' - complete: {result.written / 1000000:.3f} MB"
+                     f"{' segmented' if result.segmented else ''} in {telemetry.elapsed:.2f}s "
+                     f"{telemetry.throughput / 1000000:.4f} MB/s")
+        result.telemetry = telemetry
+        return result
+
+    async def locate(self, url: str, headers: typing.Optional[dict[str, str]] = None,
+                     telemetry: typing.Optional[TransferTelemetry] = None, **kwargs) -> str:
+        """
+        Resolves redirect of download url to file location, e.g. to learn host serving it.
+
+        @return: Location url answered by redirect
+        @raise errors.ODataHttpException: If url does not answer with redirect
+        """
+        headers = headers or await self.__headers()
+
+        async def redirect() -> tuple[aiohttp.ClientResponse, str]:
+            async with self.limiter.slot(url) as slot, self.session.get(url, headers=headers, allow_redirects=False,
+                                                                         timeout=timeout, **kwargs) as hop:
+                slot.received(hop.status)
+                logger.debug(f"{hop.method} {hop.status} - {hop.url}")
+                return hop, hop.headers.get("Location", "")
+
+        response, location = await self.__retrying("get", url, redirect, telemetry)
+        if not location:
+            response.raise_for_status()
+            raise errors.ODataHttpException(f"{url} answered {response.status} without redirect location")
+        return location
+
+    async def __download(self, url: str, file: str, headers: dict[str, str], telemetry: TransferTelemetry,
+                         chunks: typing.Union[int, typing.Literal["auto"], None], segments: int, resume: bool,
+                         checksums: typing.Optional[list[dict]], progress: typing.Optional[typing.Callable[[int], None]],
+                         bandwidth: typing.Optional[Bandwidth], location: typing.Optional[str],
+                         **kwargs) -> DownloadResult:
+        location = location or await self.locate(url, headers, telemetry, **kwargs)
+        telemetry.located(urlsplit(location).hostname or "")
+
+        logger.debug(f"File: '{file}' - {'overwrite' if Path(file).is_file() else 'new'}")
+        transfer = Transfer(self.session, url, location, file, headers, timeout, chunks=chunks, segments=segments,
+                            resume=resume, checksums=checksums, progress=progress,
+                            bandwidth=bandwidth, limiter=self.limiter, retry=self.retry,
+                            breaker=self.breaker, tuner=self.tuner, telemetry=telemetry)
+        written = await transfer.run()
+        telemetry.size = transfer.size or written
+
+        return DownloadResult(file, transfer.size or written, written, transfer.segmented, transfer.resumed,
+                              transfer.checksums)
+
+    async def __report(self, telemetry: TransferTelemetry):
+        while True:
+            await asyncio.sleep(self.telemetry_interval)
+            self.__emit(telemetry)
+
+    def __emit(self, telemetry: TransferTelemetry):
+        try:
+            self.on_transfer(telemetry)
+        except Exception as e:
+            logger.exception(f"Exception {e.__class__.__name__} raised by transfer telemetry callback:")
 
 
 class Server:
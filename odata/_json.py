@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+import typing
+import logging
+
+logger = logging.getLogger("odata.http")
+
+Decoder = typing.Callable[[bytes], typing.Any]
+DecoderName = typing.Literal["auto", "orjson", "msgspec", "json"]
+
+
+def _orjson() -> Decoder:
+    import orjson
+    return orjson.loads
+
+
+def _msgspec() -> Decoder:
+    import msgspec
+    return msgspec.json.Decoder().decode
+
+
+def _json() -> Decoder:
+    return json.loads
+
+
+_decoders: dict[str, typing.Callable[[], Decoder]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _json,
+}
+
+
+def decoder(name: typing.Union[DecoderName, Decoder] = "auto") -> Decoder:
+    """
+    JSON decoder of raw response bytes. Decoders raise ValueError on invalid data.
+
+    @param name: "orjson", "msgspec" or "json" (standard library), "auto" picks the first one installed in this order.
+                 Callable taking bytes is used as it is
+    @raise ImportError: If requested decoder is not installed
+    """
+    if callable(name):
+        return name
+    if name == "auto":
+        for candidate in _decoders:
+            try:
+                decode = _decoders[candidate]()
+            except ImportError:
+                continue
+            logger.debug(f"JSON decoder: {candidate}")
+            return decode
+    if name not in _decoders:
+        raise ValueError(f"Invalid JSON decoder {name}, must be one of auto, {', '.join(_decoders)}")
+    return _decoders[name]()
+
+
+class ValueParser:
+    """
+    Incremental parser of JSON object holding large array, by default "value" of OData collection. Items of array are
+    decoded one by one as data is fed, other members of object are collected in envelope.
+
+    @param key: Name of array decoded incrementally
+    """
+    __whitespace: re.Pattern = re.compile(r"[\s,]*")
+
+    def __init__(self, key: str = "value"):
+        self.key: str = key
+        self.envelope: dict[str, typing.Any] = {}
+        self.done: bool = False
+
+        self.__text: codecs.IncrementalDecoder = codecs.getincrementaldecoder("utf-8")()
+        self.__decoder: json.JSONDecoder = json.JSONDecoder()
+        self.__buffer: str = ""
+        self.__state: typing.Literal["start", "key", "colon", "member", "item"] = "start"
+        self.__member: str = ""
+        self.__wait: int = 0
+
+    def feed(self, data: bytes, final: bool = False) -> list[typing.Any]:
+        """
+        @param data: Next part of document
+        @param final: No data follows
+        @return: Items of array completed by data
+        @raise ValueError: If document is invalid, or incomplete when final
+        """
+        self.__buffer += self.__text.decode(data, final)
+        items = []
+        if len(self.__buffer) < self.__wait and not final:
+            return items  # incomplete value is not decoded again until buffer doubles, keeps large values linear
+        position = self.__parse(self.__buffer, items, final)
+        self.__buffer = self.__buffer[position:]
+        self.__wait = 2 * len(self.__buffer)
+        if final and not self.done:
+            raise ValueError(f"Incomplete JSON document, {len(self.__buffer)} characters left unparsed")
+        return items
+
+    def __value(self, buffer: str, position: int, final: bool) -> typing.Optional[tuple[typing.Any, int]]:
+        """ Decodes value at position, None if it may continue in data not fed yet. """
+        try:
+            value, end = self.__decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        if end >= len(buffer) and not final:
+            return None  # number may continue in next part
+        return value, end
+
+    def __parse(self, buffer: str, items: list, final: bool) -> int:
+        position = 0
+        while not self.done:
+            position = self.__whitespace.match(buffer, position).end()
+            if position >= len(buffer):
+                return position
+            char = buffer[position]
+
+            if self.__state == "start":
+                if char != "{":
+                    raise ValueError(f"Expected JSON object, got {char!r}")
+                self.__state, position = "key", position + 1
+            elif self.__state == "key":
+                if char == "}":
+                    self.done, position = True, position + 1
+                    break
+                decoded = self.__value(buffer, position, final)
+                if decoded is None:
+                    return position
+                self.__member, position = decoded
+                self.__state = "colon"
+            elif self.__state == "colon":
+                if char != ":":
+                    raise ValueError(f"Expected ':' after {self.__member!r}, got {char!r}")
+                self.__state, position = "member", position + 1
+            elif self.__state == "member" and self.__member == self.key and char == "[":
+                self.__state, position = "item", position + 1
+            elif self.__state == "member":
+                decoded = self.__value(buffer, position, final)
+                if decoded is None:
+                    return position
+                self.envelope[self.__member], position = decoded
+                self.__state = "key"
+            elif char == "]":
+                self.__state, position = "key", position + 1
+            else:
+                decoded = self.__value(buffer, position, final)
+                if decoded is None:
+                    return position
+                item, position = decoded
+                items.append(item)
+        return position
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import dataclasses
+import time
+import typing
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger("odata.http")
+
+
+@dataclasses.dataclass
+class LimitOptions:
+    """
+    Configuration of adaptive (AIMD) concurrency limit kept for every host.
+
+    @var initial: Concurrent requests allowed before anything is measured
+    @var minimum: Lowest limit decrease can reach
+    @var maximum: Highest limit increase can reach, Http caps it at PoolOptions.limit_per_host
+    @var backoff: Factor limit is multiplied by on throttling or rising latency
+    @var tolerance: Ratio of recent to long term time to first byte considered rising latency
+    @var throttled: Status codes meaning host is overloaded
+    """
+    initial: int = 4
+    minimum: int = 1
+    maximum: int = 32
+    backoff: float = 0.5
+    tolerance: float = 2.0
+    throttled: tuple[int, ...] = (429, 503)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit of single host. Grows by one for every limit of well performing requests, is cut by backoff
+    factor when host throttles or time to first byte rises above long term average.
+    """
+    __short: float = 0.3
+    __long: float = 0.05
+
+    def __init__(self, host: str, options: LimitOptions):
+        self.host: str = host
+        self._options: LimitOptions = options
+
+        self.limit: float = float(options.initial)
+        self.in_flight: int = 0
+        self.latency: float = 0.0
+        self.baseline: float = 0.0
+
+        self.__decreased: float = 0.0
+        self.__condition: asyncio.Condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.__condition:
+            await self.__condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self):
+        async with self.__condition:
+            self.in_flight -= 1
+            self.__condition.notify_all()
+
+    def record(self, status: typing.Optional[int], ttfb: typing.Optional[float]):
+        """
+        Updates limit with result of single request.
+
+        @param status: Response status, None if request failed without response
+        @param ttfb: Seconds until response headers arrived, None if unknown
+        """
+        if ttfb is not None:
+            self.latency = ttfb if not self.latency else self.latency + self.__short * (ttfb - self.latency)
+            self.baseline = ttfb if not self.baseline else self.baseline + self.__long * (ttfb - self.baseline)
+
+        if status is None or status in self._options.throttled or self.latency > self.baseline * self._options.tolerance:
+            self.__decrease(status)
+        elif status < 400:
+            self.limit = min(self._options.maximum, self.limit + 1 / self.limit)
+
+    def __decrease(self, status: typing.Optional[int]):
+        now = time.monotonic()
+        if now - self.__decreased < max(self.latency, 0.1):
+            return  # Responses of requests sent before last decrease
+        self.__decreased = now
+        limit = max(self._options.minimum, self.limit * self._options.backoff)
+        if int(limit) != int(self.limit):
+            logger.debug(f"Limit of {self.host} decreased to {int(limit)} "
+                         f"({status or 'failure'}, ttfb {self.latency:.3f}s / {self.baseline:.3f}s)")
+        self.limit = limit
+
+
+class AdaptiveLimiter:
+    """
+    Keeps AdaptiveLimit for every host requests are made to, catalogue and zipper are limited separately.
+    """
+
+    def __init__(self, options: typing.Optional[LimitOptions] = None):
+        self._options: LimitOptions = options or LimitOptions()
+        self.__hosts: dict[str, AdaptiveLimit] = {}
+
+    def host(self, url: str) -> AdaptiveLimit:
+        host = urlsplit(str(url)).hostname or ""
+        if host not in self.__hosts:
+            self.__hosts[host] = AdaptiveLimit(host, self._options)
+        return self.__hosts[host]
+
+    @property
+    def limits(self) -> dict[str, dict[str, float]]:
+        """ Current limit, requests in flight and time to first byte averages of every host. """
+        return {host: {"limit": int(limit.limit), "in_flight": limit.in_flight, "latency": limit.latency,
+                       "baseline": limit.baseline} for host, limit in self.__hosts.items()}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str) -> typing.AsyncIterator[Slot]:
+        """
+        Waits for free slot of url host. Request made within should report its response with Slot.received, failed
+        requests are recorded on exit.
+        """
+        limit = self.host(url)
+        await limit.acquire()
+        slot = Slot(limit)
+        try:
+            yield slot
+        except aiohttp.ClientResponseError as e:
+            slot.received(e.status)
+            raise
+        except (asyncio.TimeoutError, aiohttp.ServerDisconnectedError):
+            slot.received(None)
+            raise
+        finally:
+            await limit.release()
+
+
+class Slot:
+    def __init__(self, limit: AdaptiveLimit):
+        self._limit: AdaptiveLimit = limit
+        self.__start: float = time.monotonic()
+        self.__recorded: bool = False
+
+    def received(self, status: typing.Optional[int]):
+        """ Records response status and time to first byte, only first call per slot counts. """
+        if self.__recorded:
+            return
+        self.__recorded = True
+        self._limit.record(status, time.monotonic() - self.__start if status is not None else None)
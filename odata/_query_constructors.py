@@ -14,8 +14,10 @@ if typing.TYPE_CHECKING:
     from odata.client import Client
 
 import odata.errors as errors
-from odata._types import OProductNodesCollection, OProductsCollection, ODataWorkflowsCollection, OProduct
+from odata._types import OProductNodesCollection, OProductsCollection, ODataWorkflowsCollection, OProduct, ODataWorkflow
 from odata._helpers import TimeConverter
+from odata._stream import PageStream, ProductStream
+from odata._crawl import Crawl
 
 logger = logging.getLogger("odata")
 
@@ -356,6 +358,7 @@ class NotFilter(Filter):
 
 
 class QueryConstructor:
+    _endpoint: str = ""
 
     def __init__(self, client: Client):
         self.filter: QueryConstructorFilterParser = QueryConstructorFilterParser(self)
@@ -365,6 +368,7 @@ class QueryConstructor:
         self._skip: int = 0
         self._count: bool = False
         self._expand: str = ""
+        self._select: list[str] = []
         self._order_by: list[str] = []
         self._order_by_options: list[str] = []
 
@@ -375,9 +379,11 @@ class QueryConstructor:
         if self._skip:
             params.update({"$skip": self._skip})
         if self._count:
-            params.update({"$count": self._count})
+            params.update({"$count": "true"})
         if self._expand:
             params.update({"$expand": self._expand})
+        if self._select:
+            params.update({"$select": ",".join(self._select)})
         if self._order_by:
             params.update({"$orderby": f"{self._order_by[0]} {self._order_by[1]}"})
 
@@ -397,14 +403,58 @@ class QueryConstructor:
         self._skip = number
         return self
 
-    def count(self, count: bool) -> TQueryConstructor:
+    def inline_count(self, count: bool = True) -> TQueryConstructor:
+        """ Returned collection has count of all records matching query, see count for count alone. """
         self._count = count
         return self
 
+    async def count(self) -> typing.Optional[int]:
+        """
+        Number of records matching query, no records are fetched ($count=true&$top=0).
+
+        @return: Count or None if request failed
+        """
+        params = {k: v for k, v in self._parse_params().items() if k not in ("$skip", "$orderby", "$expand")}
+        params.update({"$count": "true", "$top": 0})
+        response, result = await self._client.http.request("get", self._client.http.url(self._endpoint),
+                                                           params=params)
+        if not response.ok:
+            return None
+        return int(result.get("@odata.count", 0))
+
+    async def exists(self) -> typing.Optional[bool]:
+        """
+        Whether any record matches query, at most single record with its Id only is fetched.
+
+        @return: True if query has results, None if request failed
+        """
+        result = await self._first(select="Id")
+        return None if result is None else bool(result)
+
+    async def _first(self, select: str = "") -> typing.Optional[list[dict]]:
+        params = self._parse_params()
+        params.update({"$top": 1})
+        if select:
+            params.update({"$select": select})
+        params.pop("$count", None)
+        response, result = await self._client.http.request("get", self._client.http.url(self._endpoint),
+                                                           params=params)
+        if not response.ok:
+            return None
+        return result.get("value", [])
+
     def expand(self, category: Literal["Attributes", "Assets"]) -> TQueryConstructor:
         self._expand = category
         return self
 
+    def select(self, *fields: str) -> TQueryConstructor:
+        """
+        Returned records have only selected fields, e.g. select("Id", "Name", "ContentLength"), other attributes of
+        records are None. Called without fields all fields are returned again.
+        """
+        self._select = list(fields)
+        return self
+
     def order_by(self, argument: str,
                  direction: Literal["asc", "desc"] = "asc") -> TQueryConstructor:
         if argument not in self._order_by_options:
@@ -412,11 +462,19 @@ class QueryConstructor:
             self._order_by = [argument, direction]
         return self
 
+    def _stream_params(self, max_items: typing.Optional[int]) -> dict:
+        params = self._parse_params()
+        if max_items and max_items < params.get("$top", 1000):
+            params.update({"$top": max_items})
+        return params
+
 
 TQueryConstructor = typing.TypeVar("TQueryConstructor", bound=QueryConstructor)
 
 
 class OWorkflowsQueryConstructor(QueryConstructor):
+    _endpoint: str = "Workflows"
+
     def __init__(self, client: Client):
         super().__init__(client)
 
@@ -440,21 +498,55 @@ class OWorkflowsQueryConstructor(QueryConstructor):
         collection = ODataWorkflowsCollection(self._client, response, result)
         return collection
 
+    def stream(self, prefetch: int = 1, max_items: typing.Optional[int] = None) -> PageStream[ODataWorkflow]:
+        """
+        Iterates over workflows of all pages: async for workflow in client.workflows.stream()
+
+        @param prefetch: Number of pages fetched ahead while current one is consumed
+        @param max_items: Iteration stops after this many workflows
+        """
+        return PageStream(self._client, self._client.http.url(self._endpoint), self._stream_params(max_items),
+                          lambda data: ODataWorkflow(self._client, None, data), prefetch, max_items)
+
 
 class OProductsQueryConstructor(QueryConstructor):
+    _endpoint: str = "Products"
+
     def __init__(self, client: Client):
         super().__init__(client)
 
         self._order_by_options: list[str] = ["ContentDate/Start", "ContentDate/End", "PublicationDate", "ModificationDate"]
 
     async def get(self, *ids: str) -> typing.Optional[OProductsCollection | OProduct]:
-        data = {}
+        """
+        Products of query, single product by its Id, or products by their names when more are given.
+
+        With MetadataStore configured on client, products by Id or names are served from it when stored, only missing
+        names are requested and stored ones come first in collection. Fetched products are written to it.
+
+        @return: Product, collection or None if request failed
+        """
+        store = self._client.store
+        found = []
+        if len(ids) == 1 and store is not None:
+            data = store.get(ids[0])
+            if data is not None:
+                return OProduct(self._client, data)
+        elif len(ids) > 1 and store is not None:
+            found = [d for d in map(store.by_name, ids) if d is not None]
+            names = {d["Name"] for d in found}
+            ids = tuple(nid for nid in ids if nid not in names)
+            if not ids:
+                collection = OProductsCollection(self._client, None, {"value": []})
+                collection.items[:] = [OProduct(self._client, d) for d in found]
+                return collection
+
+        data = None
         params = {}
-
-        if len(ids) > 1:
+        if len(ids) > 1 or found:
             endpoint = "Products/OData.CSC.FilterList"
             data = {
-                "FilterProducts": [{"Name": nid for nid in ids}]
+                "FilterProducts": [{"Name": nid} for nid in ids]
             }
             method = "post"
         elif len(ids) == 1:
@@ -464,16 +556,59 @@ class OProductsQueryConstructor(QueryConstructor):
             params = self._parse_params()
             endpoint = "Products"
             method = "get"
-        response, result = await self._client.http.request(method, self._client.http.url(endpoint), params=params, data=data)
+        response, result = await self._client.http.request(method, self._client.http.url(endpoint), params=params, json=data)
 
-        product = collection = None
         if not response.ok:
             return None
-        if len(ids) == 1:
-            product = OProduct(self._client, await response.json(), result)
-        else:
-            collection = OProductsCollection(self._client, response, result)
-        return product or collection
+        if method == "get" and len(ids) == 1:
+            if store is not None:
+                await store.put_async((result,))
+            return OProduct(self._client, result, response)
+        collection = OProductsCollection(self._client, response, result)
+        collection.items[:0] = [OProduct(self._client, d) for d in found]
+        return collection
+
+    async def first(self) -> typing.Optional[OProduct]:
+        """
+        First product of query in its order, only single product is fetched ($top=1).
+
+        @return: Product or None if query has no results or request failed
+        """
+        result = await self._first()
+        return OProduct(self._client, result[0]) if result else None
+
+    def stream(self, prefetch: int = 1, max_items: typing.Optional[int] = None,
+               incremental: bool = False) -> ProductStream:
+        """
+        Iterates over products of all pages: async for product in client.products.filter.where(...).stream()
+        All pages can be also collected as columns: await client.products.stream().to_numpy()
+
+        @param prefetch: Number of pages fetched ahead while current one is consumed
+        @param max_items: Iteration stops after this many products, page size is reduced to it if smaller
+        @param incremental: Decode products one by one while page arrives instead of prefetching whole pages, keeps
+                            memory low with large pages, e.g. with expanded attributes
+        """
+        return ProductStream(self._client, self._client.http.url(self._endpoint), self._stream_params(max_items),
+                             prefetch, max_items, incremental)
+
+    def crawl(self, start: datetime.datetime, end: datetime.datetime,
+              by: typing.Literal["ContentDate/Start", "PublicationDate"] = "ContentDate/Start",
+              concurrency: int = 4, shards: int = 1) -> Crawl:
+        """
+        Iterates over all products of time span matching filter, beyond skip limit of paging:
+        async for product in client.products.filter.where(...).crawl(start, end)
+
+        Span is split into time shards which are counted and split further while too dense to be paged through,
+        see Crawl for tuning. Order, top and skip of constructor are ignored.
+
+        @param start: Beginning of span, inclusive
+        @param end: End of span, exclusive
+        @param by: Date the span applies to
+        @param concurrency: Shards fetched at once
+        @param shards: Number of shards span is split into before counting
+        """
+        return Crawl(self._client, self._parse_params(), start, end, field=by, concurrency=concurrency,
+                     shards=shards)
 
     async def nodes(self, product_id: str) -> typing.Optional[OProductNodesCollection]:
         data, response = await self._client.http.request("get", f"https://datahub.creodias.eu/odata/v1/Products({product_id})/Nodes")
@@ -487,6 +622,8 @@ class OProductsQueryConstructor(QueryConstructor):
 """
 
 class OProductsQueryConstructor(QueryConstructor):
+    _endpoint: str = "Products"
+
     def __init__(self, client: Client):
         super().__init__(client)
 
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+import typing
+import logging
+
+if typing.TYPE_CHECKING:
+    from odata.client import Client
+
+from odata._types import ODataWorkflow
+from odata._query_constructors import OWorkflowsQueryConstructor
+
+logger = logging.getLogger("odata")
+
+
+class WorkflowRegistry:
+    """
+    In-memory catalogue of all workflows indexed by name, id and input product type, lookups do not send requests.
+
+    Catalogue is reloaded in background every interval seconds once started. Lookups always answer from the last
+    loaded catalogue, stale one included, and schedule reload if it is older than interval while background refresh
+    is not running. Failed reload keeps previous catalogue.
+
+    @param client: Client sending requests
+    @param interval: Seconds catalogue is considered fresh
+    @var refreshed: Monotonic time of last successful load, None before first one
+    """
+
+    def __init__(self, client: Client, interval: float = 300.0):
+        self._client: Client = client
+        self.interval: float = interval
+        self.refreshed: typing.Optional[float] = None
+        self.refreshes: int = 0
+        self.failures: int = 0
+
+        self.__workflows: tuple[ODataWorkflow, ...] = ()
+        self.__by_name: dict[str, ODataWorkflow] = {}
+        self.__by_id: dict[str, ODataWorkflow] = {}
+        self.__by_input: dict[str, tuple[ODataWorkflow, ...]] = {}
+        self.__loading: typing.Optional[asyncio.Future] = None
+        self.__keeper: typing.Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.__workflows)
+
+    def __iter__(self) -> typing.Iterator[ODataWorkflow]:
+        self.__revalidate()
+        return iter(self.__workflows)
+
+    @property
+    def stale(self) -> bool:
+        return self.refreshed is None or time.monotonic() - self.refreshed >= self.interval
+
+    def get(self, name: str) -> typing.Optional[ODataWorkflow]:
+        """ Workflow by Name, first one in catalogue order if more versions share it. """
+        self.__revalidate()
+        return self.__by_name.get(name)
+
+    def by_id(self, workflow_id: str) -> typing.Optional[ODataWorkflow]:
+        self.__revalidate()
+        return self.__by_id.get(workflow_id)
+
+    def for_input(self, product_type: str) -> tuple[ODataWorkflow, ...]:
+        """ Workflows accepting product type as input. """
+        self.__revalidate()
+        return self.__by_input.get(product_type, ())
+
+    async def ready(self) -> WorkflowRegistry:
+        """
+        Starts background refresh and waits for first load.
+
+        @raise errors.ODataHttpException: If first load fails
+        """
+        self.start()
+        if self.refreshed is None:
+            await self.refresh()
+        return self
+
+    def start(self):
+        """ Starts background refresh within running loop. """
+        if self.__keeper is None or self.__keeper.done():
+            self.__keeper = asyncio.ensure_future(self.__keep_fresh())
+
+    def stop(self):
+        if self.__keeper is not None:
+            self.__keeper.cancel()
+            self.__keeper = None
+
+    async def refresh(self):
+        """
+        Loads catalogue now, concurrent callers share single load.
+
+        @raise errors.ODataHttpException: If catalogue request fails
+        """
+        await asyncio.shield(self.__schedule())
+
+    def __schedule(self) -> asyncio.Future:
+        if self.__loading is None:
+            self.__loading = asyncio.ensure_future(self.__load())
+            self.__loading.add_done_callback(self.__loaded)
+        return self.__loading
+
+    def __loaded(self, loading: asyncio.Future):
+        self.__loading = None
+        if not loading.cancelled() and loading.exception() is not None:
+            self.failures += 1
+            logger.warning(f"Workflows not refreshed, {len(self.__workflows)} previous kept: {loading.exception()}")
+
+    async def __load(self):
+        workflows = tuple([w async for w in OWorkflowsQueryConstructor(self._client).stream()])
+        by_input: dict[str, list[ODataWorkflow]] = {}
+        for workflow in workflows:
+            for product_type in dict.fromkeys([*workflow.input_product_types, workflow.input_product_type]):
+                if product_type:
+                    by_input.setdefault(product_type, []).append(workflow)
+
+        by_name: dict[str, ODataWorkflow] = {}
+        for workflow in workflows:
+            by_name.setdefault(workflow.name, workflow)
+
+        self.__workflows = workflows
+        self.__by_name = by_name
+        self.__by_id = {workflow.id: workflow for workflow in workflows}
+        self.__by_input = {product_type: tuple(ws) for product_type, ws in by_input.items()}
+        self.refreshed = time.monotonic()
+        self.refreshes += 1
+        logger.debug(f"Workflows refreshed: {len(workflows)}")
+
+    async def __keep_fresh(self):
+        while True:
+            with contextlib.suppress(Exception):
+                await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def __revalidate(self):
+        """ Stale catalogue is served while it is reloaded, reload needs running loop. """
+        if not self.stale or self.__loading is not None or (self.__keeper is not None and not self.__keeper.done()):
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.__schedule()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import datetime
+import email.utils
+import random
+import time
+import typing
+import logging
+from urllib.parse import urlsplit
+
+import odata.errors as errors
+
+logger = logging.getLogger("odata.http")
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+    """
+    Retry configuration of idempotent requests and per host circuit breaker.
+
+    @var attempts: Total number of tries of single request
+    @var base: Backoff of first retry in seconds, doubled with every next one
+    @var cap: Highest backoff in seconds
+    @var retry_after: Highest accepted Retry-After header value in seconds
+    @var statuses: Response statuses that are retried
+    @var methods: Methods safe to be repeated
+    @var circuit_threshold: Consecutive failures of host that open its circuit
+    @var circuit_reset: Seconds circuit stays open before single trial request is let through
+    """
+    attempts: int = 4
+    base: float = 0.5
+    cap: float = 30.0
+    retry_after: float = 120.0
+    statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+    methods: tuple[str, ...] = ("GET", "HEAD", "OPTIONS")
+    circuit_threshold: int = 5
+    circuit_reset: float = 30.0
+
+    def retries(self, method: str) -> bool:
+        return method.upper() in self.methods and self.attempts > 1
+
+    def delay(self, attempt: int, headers: typing.Optional[typing.Mapping[str, str]] = None) -> float:
+        """
+        Seconds to wait before next try. Retry-After header is honoured, otherwise backoff with full jitter is used.
+
+        @param attempt: Number of failed tries so far, starting with 1
+        @param headers: Headers of failed response
+        """
+        retry_after = self.__retry_after(headers)
+        if retry_after is not None:
+            return min(retry_after, self.retry_after)
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def __retry_after(headers: typing.Optional[typing.Mapping[str, str]]) -> typing.Optional[float]:
+        value = (headers or {}).get("Retry-After")
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    Stops requests to host after consecutive failures. Once open, circuit rejects requests for reset period, then lets
+    single trial request through - its success closes circuit, failure opens it again. Trial which ends without
+    outcome, e.g. cancelled or failed with other error, is released, trial not reporting back within reset period
+    expires, so next request becomes the trial.
+    """
+
+    def __init__(self, policy: RetryPolicy):
+        self._policy: RetryPolicy = policy
+        self.__failures: dict[str, int] = {}
+        self.__opened: dict[str, float] = {}
+        self.__trials: dict[str, float] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(str(url)).hostname or ""
+
+    @property
+    def states(self) -> dict[str, str]:
+        """ State of every host seen: "closed", "open" or "half-open" """
+        return {host: self.__state(host) for host in self.__failures}
+
+    def __state(self, host: str) -> str:
+        if host not in self.__opened:
+            return "closed"
+        if time.monotonic() - self.__opened[host] < self._policy.circuit_reset:
+            return "open"
+        return "half-open"
+
+    def check(self, url: str):
+        """
+        @raise errors.CircuitOpenError: If requests to url host are currently rejected
+        """
+        host = self._host(url)
+        state = self.__state(host)
+        if state == "closed":
+            return
+        if state == "half-open" and not self.__trial(host):
+            self.__trials[host] = time.monotonic()
+            return
+        remaining = self._policy.circuit_reset - (time.monotonic() - self.__opened[host])
+        raise errors.CircuitOpenError(host, max(0.0, remaining))
+
+    def __trial(self, host: str) -> bool:
+        """ Whether trial request of host is running, expired trial is dropped. """
+        started = self.__trials.get(host)
+        if started is not None and time.monotonic() - started >= self._policy.circuit_reset:
+            logger.debug(f"Trial request of {host} expired")
+            del self.__trials[host]
+            return False
+        return started is not None
+
+    @contextlib.contextmanager
+    def admit(self, url: str) -> typing.Iterator[None]:
+        """
+        Checks url host and releases its trial if request within ends without success or failure being reported.
+
+        @raise errors.CircuitOpenError: If requests to url host are currently rejected
+        """
+        self.check(url)
+        host = self._host(url)
+        trial = self.__trials.get(host)
+        try:
+            yield
+        finally:
+            if trial is not None and self.__trials.get(host) == trial:
+                del self.__trials[host]
+
+    def success(self, url: str):
+        host = self._host(url)
+        if host in self.__opened:
+            logger.info(f"Circuit of {host} closed")
+        self.__failures[host] = 0
+        self.__opened.pop(host, None)
+        self.__trials.pop(host, None)
+
+    def failure(self, url: str):
+        host = self._host(url)
+        self.__failures[host] = self.__failures.get(host, 0) + 1
+        if host in self.__trials or self.__failures[host] >= self._policy.circuit_threshold:
+            if host not in self.__opened or host in self.__trials:
+                logger.warning(f"Circuit of {host} opened after {self.__failures[host]} failures")
+            self.__opened[host] = time.monotonic()
+            self.__trials.pop(host, None)
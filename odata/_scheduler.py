@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+import typing
+import logging
+from urllib.parse import urlsplit
+
+if typing.TYPE_CHECKING:
+    from odata._types import OProduct
+    from odata._download import DownloadResult
+
+logger = logging.getLogger("odata.scheduler")
+
+
+class Bandwidth:
+    """
+    Token bucket shared by transfers to cap their total throughput.
+
+    @param rate: Allowed bytes per second
+    @param burst: Bucket capacity in bytes, one second of rate by default
+    """
+
+    def __init__(self, rate: float, burst: typing.Optional[float] = None):
+        self.rate: float = rate
+        self.burst: float = burst or rate
+        self.__tokens: float = self.burst
+        self.__updated: float = time.monotonic()
+        self.__lock: asyncio.Lock = asyncio.Lock()
+
+    async def consume(self, amount: int):
+        async with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.__tokens -= amount
+            if self.__tokens < 0:
+                await asyncio.sleep(-self.__tokens / self.rate)
+
+
+@dataclasses.dataclass
+class DownloadProgress:
+    """
+    Progress report passed to scheduler callback.
+
+    @var rate: Bytes per second of this product since its download started
+    @var total_rate: Bytes per second of all downloads since scheduler started
+    """
+    product: OProduct
+    received: int
+    size: int
+    rate: float
+    total_received: int
+    total_rate: float
+    finished: bool = False
+
+
+@dataclasses.dataclass
+class ProductDownload:
+    """
+    Outcome of single product download in bulk.
+
+    @var status: "done" if product was saved, "failed" otherwise
+    @var error: Exception raised by failed download
+    """
+    product: OProduct
+    status: typing.Literal["done", "failed"]
+    result: typing.Optional[DownloadResult] = None
+    error: typing.Optional[BaseException] = None
+    elapsed: float = 0.0
+
+
+class DownloadScheduler:
+    """
+    Downloads many products with bounded concurrency. Failure of one product does not stop the others, every product
+    gets its ProductDownload.
+
+    @param concurrency: Maximum number of products downloaded at once
+    @param per_host: Maximum number of products downloaded at once from single storage host download redirects to
+    @param bandwidth: Optional cap of total throughput in bytes per second
+    @param order: "largest" or "smallest" content length first, or "eviction" - soonest evicted first
+    @param progress: Callback receiving DownloadProgress, called at most every interval seconds per product
+    @param segments: Byte ranges per product, see Http.download
+    @param chunks: Read size in bytes or "auto", see Http.download
+    """
+    __orders: dict[str, typing.Callable[[OProduct], typing.Any]] = {
+        "largest": lambda p: -(p.content_length or 0),
+        "smallest": lambda p: p.content_length or 0,
+        "eviction": lambda p: p.eviction_date.timestamp() if p.eviction_date else float("inf"),
+    }
+
+    def __init__(self, concurrency: int = 4, per_host: int = 2, bandwidth: typing.Optional[float] = None,
+                 order: typing.Literal["largest", "smallest", "eviction"] = "largest",
+                 progress: typing.Optional[typing.Callable[[DownloadProgress], None]] = None, segments: int = 1,
+                 chunks: typing.Union[int, typing.Literal["auto"], None] = "auto", interval: float = 1.0):
+        if order not in self.__orders:
+            raise ValueError(f"Invalid order {order}, must be one of {', '.join(self.__orders)}")
+        self._concurrency: int = concurrency
+        self._per_host: int = per_host
+        self._bandwidth: typing.Optional[Bandwidth] = Bandwidth(bandwidth) if bandwidth else None
+        self._order: str = order
+        self._progress: typing.Optional[typing.Callable[[DownloadProgress], None]] = progress
+        self._segments: int = segments
+        self._chunks: typing.Union[int, typing.Literal["auto"], None] = chunks
+        self._interval: float = interval
+
+        self.__started: float = 0.0
+        self.__received: int = 0
+
+    async def run(self, products: typing.Iterable[OProduct]) -> list[ProductDownload]:
+        """
+        Downloads products in configured order. Workers take products one by one, storage host of product is
+        resolved once it is next in line and its location is passed to download, so redirect is followed only once.
+
+        @return: ProductDownload for every product, in download order
+        """
+        queue = sorted(products, key=self.__orders[self._order])
+        results: list[typing.Optional[ProductDownload]] = [None] * len(queue)
+        pending = iter(enumerate(queue))
+        hosts: dict[str, asyncio.Semaphore] = {}
+
+        self.__started = time.monotonic()
+        self.__received = 0
+
+        async def worker():
+            for i, product in pending:
+                try:
+                    location = await self.__locate(product)
+                except Exception as e:
+                    logger.warning(f"Product {product.name} failed: {e.__class__.__name__}: {e}")
+                    results[i] = ProductDownload(product, "failed", error=e)
+                    continue
+                host = urlsplit(location).hostname or ""
+                async with hosts.setdefault(host, asyncio.Semaphore(self._per_host)):
+                    results[i] = await self.__download(product, location)
+
+        await asyncio.gather(*[worker() for _ in range(max(1, min(self._concurrency, len(queue))))])
+        failed = sum(r.status == "failed" for r in results)
+        logger.info(f"Bulk download finished: {len(results) - failed} done, {failed} failed in "
+                    f"{time.monotonic() - self.__started:.2f}s")
+        return list(results)
+
+    @staticmethod
+    async def __locate(product: OProduct) -> str:
+        """ Location of product archive, catalogue redirects downloads to storage hosts. """
+        http = product._client.http
+        return await http.locate(http.url(f"Products({product.id})/$value"))
+
+    async def __download(self, product: OProduct, location: str) -> ProductDownload:
+        start = time.monotonic()
+        received = 0
+        reported = 0.0
+
+        def report(finished: bool = False):
+            now = time.monotonic()
+            self._progress(DownloadProgress(
+                product, received, product.content_length or 0, received / max(now - start, 1e-6),
+                self.__received, self.__received / max(now - self.__started, 1e-6), finished
+            ))
+
+        def progress(amount: int):
+            nonlocal received, reported
+            received += amount
+            self.__received += amount
+            if self._progress and time.monotonic() - reported >= self._interval:
+                reported = time.monotonic()
+                report()
+
+        try:
+            result = await product.save(segments=self._segments, chunks=self._chunks, progress=progress,
+                                        bandwidth=self._bandwidth, location=location)
+        except Exception as e:
+            logger.warning(f"Product {product.name} failed: {e.__class__.__name__}: {e}")
+            return ProductDownload(product, "failed", error=e, elapsed=time.monotonic() - start)
+        finally:
+            if self._progress:
+                report(finished=True)
+        return ProductDownload(product, "done", result=result, elapsed=time.monotonic() - start)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import datetime
+import json
+import sqlite3
+import threading
+import time
+import typing
+import logging
+
+from odata._helpers import TimeConverter, GeoJson
+
+logger = logging.getLogger("odata")
+
+
+class MetadataStore:
+    """
+    Persistent store of product records in SQLite database, shared by processes using the same file. Database is in
+    WAL mode, so readers do not block the writer and concurrent writers wait for each other up to timeout.
+
+    Records are indexed by Id, Name, collection, ContentDate and bounding box of footprint (R*Tree). Records need Id
+    and Name, fields of newer record replace stored ones and fields it lacks, e.g. not in $select projection or
+    Attributes when not expanded, are kept from earlier record. Records are served once all product fields were
+    stored, records known only from projections do not shadow full products.
+
+    Writes run on single writer thread with its own connection, so serialization and SQLite I/O do not block the
+    event loop, see submit and put_async.
+
+    @param path: Database file, created if it does not exist
+    @param max_age: Seconds record is served after it was stored, None serves records regardless of age. Online and
+                    EvictionDate of products change over time
+    @param timeout: Seconds write waits for lock held by other process
+    """
+    __fields: frozenset[str] = frozenset(("Id", "Name"))
+    __product: frozenset[str] = frozenset((
+        "Id", "Name", "ContentType", "ContentLength", "OriginDate", "PublicationDate", "ModificationDate", "Online",
+        "EvictionDate", "S3Path", "Checksum", "ContentDate"
+    ))
+    __schema: tuple[str, ...] = (
+        """CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            collection TEXT,
+            content_start REAL,
+            content_end REAL,
+            stored REAL NOT NULL,
+            data TEXT NOT NULL,
+            attributes TEXT,
+            complete INTEGER NOT NULL DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS products_name ON products (name)",
+        "CREATE INDEX IF NOT EXISTS products_collection ON products (collection, content_start)",
+        "CREATE INDEX IF NOT EXISTS products_content ON products (content_start, content_end)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_bbox USING rtree(row, min_x, max_x, min_y, max_y)",
+    )
+
+    def __init__(self, path: str, max_age: typing.Optional[float] = 3600.0, timeout: float = 30.0):
+        self.path: str = path
+        self.max_age: typing.Optional[float] = max_age
+
+        self.__writer: sqlite3.Connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self.__writer.execute("PRAGMA journal_mode=WAL")
+        self.__writer.execute("PRAGMA synchronous=NORMAL")
+        with self.__writer:
+            for statement in self.__schema:
+                self.__writer.execute(statement)
+            self.__migrate()
+        self.__db: sqlite3.Connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self.__lock: threading.Lock = threading.Lock()
+        self.__executor: concurrent.futures.ThreadPoolExecutor = \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="odata-store")
+
+    def __migrate(self):
+        """ Databases created before complete column held only full product records. """
+        columns = {row[1] for row in self.__writer.execute("PRAGMA table_info(products)")}
+        if "complete" not in columns:
+            self.__writer.execute("ALTER TABLE products ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+
+    def __len__(self) -> int:
+        return self.__db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def close(self):
+        """ Waits for submitted writes and closes database, from any thread. """
+        self.__executor.shutdown(wait=True)
+        self.__writer.close()
+        self.__db.close()
+
+    def put(self, data: dict) -> bool:
+        """
+        @return: Whether record had Id and Name and was stored
+        """
+        return self.put_many((data,)) == 1
+
+    def submit(self, records: typing.Iterable[dict]) -> concurrent.futures.Future:
+        """
+        Stores records on writer thread, caller does not wait.
+
+        @return: Future of number of records stored
+        """
+        future = self.__executor.submit(self.put_many, list(records))
+        future.add_done_callback(self.__submitted)
+        return future
+
+    async def put_async(self, records: typing.Iterable[dict]) -> int:
+        """ Stores records on writer thread and waits for them, see put_many. """
+        return await asyncio.wrap_future(self.submit(records))
+
+    @staticmethod
+    def __submitted(future: concurrent.futures.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Product records not stored: {future.exception()}")
+
+    def put_many(self, records: typing.Iterable[dict]) -> int:
+        """
+        Inserts or updates records in single transaction. Blocking, within event loop use submit or put_async.
+
+        @return: Number of records stored
+        """
+        stored = 0
+        now = time.time()
+        with self.__lock, self.__writer:
+            for data in records:
+                if not self.__fields <= data.keys():
+                    continue
+                self.__writer.execute(
+                    """INSERT INTO products (id, name, collection, content_start, content_end, stored, data, attributes,
+                                             complete)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (id) DO UPDATE SET
+                           name = excluded.name, collection = COALESCE(excluded.collection, products.collection),
+                           content_start = COALESCE(excluded.content_start, products.content_start),
+                           content_end = COALESCE(excluded.content_end, products.content_end),
+                           stored = excluded.stored, data = json_patch(products.data, excluded.data),
+                           attributes = COALESCE(excluded.attributes, products.attributes),
+                           complete = MAX(excluded.complete, products.complete)""",
+                    self.__row(data, now)
+                )
+                if "GeoFootprint" not in data:
+                    stored += 1
+                    continue
+                row = self.__writer.execute("SELECT rowid FROM products WHERE id = ?", (data["Id"],)).fetchone()[0]
+                bounds = GeoJson.bounds(data["GeoFootprint"])
+                if bounds:
+                    self.__writer.execute("INSERT OR REPLACE INTO products_bbox VALUES (?, ?, ?, ?, ?)",
+                                          (row, bounds[0], bounds[2], bounds[1], bounds[3]))
+                else:
+                    self.__writer.execute("DELETE FROM products_bbox WHERE row = ?", (row,))
+                stored += 1
+        return stored
+
+    def get(self, product_id: str) -> typing.Optional[dict]:
+        """ Record of product by Id, None if it is not stored, known only from projections or older than max_age. """
+        return next(iter(self.__select("id = ? AND complete = 1", (product_id,), 1)), None)
+
+    def by_name(self, name: str) -> typing.Optional[dict]:
+        """ Record of product by Name, None if it is not stored, known only from projections or older than max_age. """
+        return next(iter(self.__select("name = ? AND complete = 1", (name,), 1)), None)
+
+    def search(self, collection: typing.Optional[str] = None,
+               start: typing.Optional[typing.Union[str, datetime.datetime]] = None,
+               end: typing.Optional[typing.Union[str, datetime.datetime]] = None,
+               bbox: typing.Optional[tuple[float, float, float, float]] = None,
+               limit: typing.Optional[int] = None, complete: bool = True) -> list[dict]:
+        """
+        Stored records matching all given conditions, ordered by ContentDate/Start. Wrap them in OProduct for objects.
+
+        @param collection: Name of collection, e.g. "SENTINEL-2"
+        @param start: ContentDate/End is at or after start, datetime or ISO 8601 string
+        @param end: ContentDate/Start is before end, datetime or ISO 8601 string
+        @param bbox: Minimum x, minimum y, maximum x and maximum y, footprint bounding box intersects it
+        @param limit: Highest number of records returned
+        @param complete: Leave out records known only from projections
+        """
+        conditions, params = [], []
+        if complete:
+            conditions.append("complete = 1")
+        if collection:
+            conditions.append("collection = ?")
+            params.append(collection.upper())
+        if start:
+            conditions.append("content_end >= ?")
+            params.append(self.__timestamp(start))
+        if end:
+            conditions.append("content_start < ?")
+            params.append(self.__timestamp(end))
+        if bbox:
+            conditions.append("rowid IN (SELECT row FROM products_bbox "
+                              "WHERE max_x >= ? AND min_x <= ? AND max_y >= ? AND min_y <= ?)")
+            params.extend((bbox[0], bbox[2], bbox[1], bbox[3]))
+        return self.__select(" AND ".join(conditions) or "1", tuple(params), limit)
+
+    def __select(self, condition: str, params: tuple, limit: typing.Optional[int]) -> list[dict]:
+        query = f"SELECT data, attributes FROM products WHERE {condition}"
+        if self.max_age is not None:
+            query += " AND stored >= ?"
+            params += (time.time() - self.max_age,)
+        query += " ORDER BY content_start"
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+
+        records = []
+        for data, attributes in self.__db.execute(query, params):
+            record = json.loads(data)
+            if attributes is not None:
+                record["Attributes"] = json.loads(attributes)
+            records.append(record)
+        return records
+
+    @classmethod
+    def __row(cls, data: dict, now: float) -> tuple:
+        content = data.get("ContentDate") or {}
+        attributes = data.get("Attributes")
+        record = {k: v for k, v in data.items() if k != "Attributes"}
+        return (data["Id"], data["Name"], cls.__collection(data), cls.__timestamp(content.get("Start")),
+                cls.__timestamp(content.get("End")), now, json.dumps(record, separators=(",", ":")),
+                None if attributes is None else json.dumps(attributes, separators=(",", ":")),
+                int(cls.__product <= data.keys()))
+
+    @staticmethod
+    def __collection(data: dict) -> typing.Optional[str]:
+        """ Collection is not part of product record, it is taken from S3Path, e.g. /eodata/Sentinel-2/... """
+        parts = (data.get("S3Path") or "").split("/")
+        return parts[2].upper() if len(parts) > 2 and parts[2] else None
+
+    @staticmethod
+    def __timestamp(value: typing.Optional[typing.Union[str, datetime.datetime]]) -> typing.Optional[float]:
+        """ Naive dates are taken as UTC, as in TimeConverter.to_str. """
+        if not value:
+            return None
+        date = TimeConverter.to_date(value) if isinstance(value, str) else value
+        return (date if date.tzinfo else date.replace(tzinfo=datetime.timezone.utc)).timestamp()
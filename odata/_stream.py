@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import typing
+import logging
+
+if typing.TYPE_CHECKING:
+    import numpy
+    import pyarrow
+    from odata.client import Client
+
+import odata.errors as errors
+from odata._types import OProduct
+from odata._columns import ProductColumns
+
+logger = logging.getLogger("odata")
+
+T = typing.TypeVar("T")
+
+
+class PageStream(typing.Generic[T]):
+    """
+    Asynchronous iterator over items of paginated collection. Pages are followed by @odata.nextLink, next pages are
+    fetched in background while current one is consumed.
+
+    In incremental mode items are decoded one by one while page body arrives, so memory stays close to single item
+    even with large pages. Pages are not prefetched then, next link is known only once page is read.
+
+    @param client: Client sending requests
+    @param url: Url of first page
+    @param params: Query parameters of first page, next links carry their own
+    @param item: Creates item from its decoded JSON
+    @param prefetch: Number of pages fetched ahead of consumer
+    @param max_items: Iteration stops after this many items, all items by default
+    @param incremental: Decode page body incrementally instead of prefetching whole pages
+    """
+
+    def __init__(self, client: Client, url: str, params: dict, item: typing.Callable[[dict], T],
+                 prefetch: int = 1, max_items: typing.Optional[int] = None, incremental: bool = False):
+        self._client: Client = client
+        self._url: str = url
+        self._params: dict = params
+        self._item: typing.Callable[[dict], T] = item
+        self._prefetch: int = max(1, prefetch)
+        self._max_items: typing.Optional[int] = max_items
+        self._incremental: bool = incremental
+
+        self.pages_fetched: int = 0
+        self.items_yielded: int = 0
+
+    async def __aiter__(self) -> typing.AsyncIterator[T]:
+        async with contextlib.aclosing(self.records()) as records:
+            async for data in records:
+                yield self._item(data)
+
+    async def records(self) -> typing.AsyncIterator[dict]:
+        """ Decoded JSON of items, up to max_items. """
+        if self._max_items is not None and self._max_items <= 0:
+            return
+        async with contextlib.aclosing(self.__incremental() if self._incremental else self.__paged()) as records:
+            async for data in records:
+                self.items_yielded += 1
+                yield data
+                if self._max_items is not None and self.items_yielded >= self._max_items:
+                    return
+
+    async def __paged(self) -> typing.AsyncIterator[dict]:
+        async with contextlib.aclosing(self.pages()) as pages:
+            async for page in pages:
+                for data in page.get("value", []):
+                    yield data
+
+    async def __incremental(self) -> typing.AsyncIterator[dict]:
+        url, params = self._url, self._params
+        while url:
+            envelope = {}
+            async for data in self._client.http.items("get", url, envelope, params=params):
+                yield data
+            self.pages_fetched += 1
+            url, params = envelope.get("@odata.nextLink", ""), None
+
+    async def pages(self) -> typing.AsyncIterator[dict]:
+        """
+        Decoded pages in server order. Closing iterator stops background fetching.
+
+        @raise errors.ODataHttpException: If page request fails
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._prefetch)
+        producer = asyncio.ensure_future(self.__fetch(queue))
+        try:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    return
+                if isinstance(page, BaseException):
+                    raise page
+                yield page
+        finally:
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
+
+    async def __fetch(self, queue: asyncio.Queue):
+        url, params = self._url, self._params
+        received = 0
+        try:
+            while url:
+                response, data = await self._client.http.request("get", url, params=params)
+                if not response.ok:
+                    raise errors.ODataHttpException(f"{url} answered {response.status} {response.reason}")
+                self.pages_fetched += 1
+                await queue.put(data)
+
+                received += len(data.get("value", []))
+                if self._max_items is not None and received >= self._max_items:
+                    break
+                url, params = data.get("@odata.nextLink", ""), None
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+
+
+class ProductStream(PageStream[OProduct]):
+    """
+    PageStream of products, which can be also collected into columns straight from page JSON, see ProductColumns.
+    """
+
+    def __init__(self, client: Client, url: str, params: dict, prefetch: int = 1,
+                 max_items: typing.Optional[int] = None, incremental: bool = False):
+        super().__init__(client, url, params, lambda data: OProduct(client, data), prefetch, max_items, incremental)
+
+    async def columns(self) -> ProductColumns:
+        """ Fetches all pages into columns without creating OProduct objects. """
+        columns = ProductColumns()
+        async with contextlib.aclosing(self.records()) as records:
+            async for data in records:
+                columns.add(data)
+        return columns
+
+    async def to_columns(self) -> dict[str, list]:
+        return (await self.columns()).to_columns()
+
+    async def to_numpy(self) -> dict[str, numpy.ndarray]:
+        return (await self.columns()).to_numpy()
+
+    async def to_arrow(self) -> pyarrow.Table:
+        return (await self.columns()).to_arrow()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import time
+import typing
+
+
+@dataclasses.dataclass
+class Stall:
+    """
+    Period without received data.
+
+    @var start: Seconds since transfer start
+    @var duration: Length of period in seconds, still growing if stall is ongoing
+    """
+    start: float
+    duration: float
+
+
+@dataclasses.dataclass
+class TransferTelemetry:
+    """
+    Measurements of single download, updated while it runs.
+
+    @var redirect: Seconds taken by redirect hop to product location
+    @var ttfb: Seconds from resolved location to first byte of product
+    @var timeline: Samples of (seconds since start, bytes received so far)
+    @var stalls: Periods longer than stall threshold without data
+    @var retries: Number of retried requests and segments
+    @var throughput: Bytes per second of finished transfer, running average before
+    """
+    url: str
+    file: str
+    started: datetime.datetime = dataclasses.field(default_factory=datetime.datetime.now)
+    host: str = ""
+    size: int = 0
+    redirect: typing.Optional[float] = None
+    ttfb: typing.Optional[float] = None
+    received: int = 0
+    timeline: list[tuple[float, int]] = dataclasses.field(default_factory=list)
+    stalls: list[Stall] = dataclasses.field(default_factory=list)
+    retries: int = 0
+    throughput: float = 0.0
+    status: typing.Literal["running", "done", "failed"] = "running"
+    error: typing.Optional[str] = None
+
+    stall_threshold: float = dataclasses.field(default=2.0, repr=False)
+    sample_interval: float = dataclasses.field(default=0.5, repr=False)
+
+    _start: float = dataclasses.field(default_factory=time.monotonic, repr=False)
+    _located: typing.Optional[float] = dataclasses.field(default=None, repr=False)
+    _last: typing.Optional[float] = dataclasses.field(default=None, repr=False)
+    _sampled: float = dataclasses.field(default=0.0, repr=False)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    @property
+    def stalled(self) -> bool:
+        """ True if no data arrived for longer than stall threshold, ongoing stall is last of stalls. """
+        self.__check()
+        return self.status == "running" and self._last is not None and \
+            time.monotonic() - self._last > self.stall_threshold
+
+    def located(self, host: str):
+        """ Marks end of redirect hop. """
+        self._located = self._last = time.monotonic()
+        self.redirect = self._located - self._start
+        self.host = host
+
+    def retry(self):
+        self.retries += 1
+
+    def receive(self, amount: int):
+        now = time.monotonic()
+        if self.ttfb is None:
+            self.ttfb = now - (self._located or self._start)
+        self.__check(now)
+        self._last = now
+        self.received += amount
+        if now - self._sampled >= self.sample_interval:
+            self._sampled = now
+            self.timeline.append((now - self._start, self.received))
+            self.throughput = self.received / max(now - self._start, 1e-6)
+
+    def __check(self, now: typing.Optional[float] = None):
+        """ Opens or extends stall if data did not arrive for longer than threshold. """
+        if self._last is None or self.status != "running":
+            return
+        now = now or time.monotonic()
+        gap = now - self._last
+        if gap <= self.stall_threshold:
+            return
+        start = self._last - self._start
+        if self.stalls and self.stalls[-1].start == start:
+            self.stalls[-1].duration = gap
+        else:
+            self.stalls.append(Stall(start, gap))
+
+    def finish(self, error: typing.Optional[BaseException] = None):
+        self.__check()
+        now = time.monotonic()
+        self.timeline.append((now - self._start, self.received))
+        self.throughput = self.received / max(now - self._start, 1e-6)
+        self.status = "failed" if error else "done"
+        self.error = f"{error.__class__.__name__}: {error}" if error else None
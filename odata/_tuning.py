@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import typing
+import logging
+import os
+
+logger = logging.getLogger("odata.http")
+
+
+class ChunkTuner:
+    """
+    Read size autotuning of downloads. Every transfer stream gets ChunkProbe searching for read size with the best
+    throughput, result of the fastest stream is kept per host once transfer ends and persisted to hints file, so next
+    download starts near it.
+
+    Read returns at most what response buffer holds, which is twice its read_bufsize, so tuned streams are opened
+    with buffer and sizes above maximum are never searched.
+
+    @param path: JSON file with read size hints, not persisted if empty
+    @var buffer: read_bufsize of tuned responses
+    """
+    buffer: int = 1024 * 1024
+    minimum: int = 64 * 1024
+    maximum: int = 2 * buffer
+    initial: int = 256 * 1024
+
+    def __init__(self, path: str = ""):
+        self._path: str = path
+        self.hints: dict[str, int] = {}
+
+        self.__lock: threading.Lock = threading.Lock()
+
+        if path and os.path.isfile(path):
+            try:
+                with open(path) as f:
+                    self.hints = {host: int(size) for host, size in json.load(f).items()}
+            except (OSError, ValueError, AttributeError):
+                logger.debug(f"Read size hints '{path}' could not be loaded")
+
+    def probe(self, host: str) -> ChunkProbe:
+        return ChunkProbe(self, host, max(self.minimum, min(self.maximum, self.hints.get(host, self.initial))))
+
+    @staticmethod
+    def default_path() -> str:
+        """ Hints file in user cache directory, $XDG_CACHE_HOME/odata/chunks.json or ~/.cache/odata/chunks.json """
+        cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(cache, "odata", "chunks.json")
+
+    def record(self, probes: typing.Iterable[ChunkProbe]):
+        """
+        Stores read size of the fastest probe of every host, hints file is written in executor once they are stored.
+
+        @param probes: Finished probes of single transfer, one per stream
+        """
+        best: dict[str, ChunkProbe] = {}
+        for probe in probes:
+            if probe.rate and probe.rate > getattr(best.get(probe.host), "rate", 0.0):
+                best[probe.host] = probe
+        changed = False
+        for host, probe in best.items():
+            if self.hints.get(host) != probe.best:
+                logger.debug(f"Read size of {host} tuned to {probe.best // 1024} KiB "
+                             f"({probe.rate / 1000000:.2f} MB/s)")
+                self.hints[host] = probe.best
+                changed = True
+        if changed and self._path:
+            asyncio.get_running_loop().run_in_executor(None, self.__save, dict(self.hints))
+
+    def __save(self, hints: dict[str, int]):
+        with self.__lock:
+            try:
+                os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+                with open(f"{self._path}.tmp", "w") as f:
+                    json.dump(hints, f)
+                os.replace(f"{self._path}.tmp", self._path)
+            except OSError as e:
+                logger.debug(f"Read size hints '{self._path}' could not be saved: {e}")
+
+
+class ChunkProbe:
+    """
+    Hill climbing over read sizes of single stream. Throughput is measured in windows, size is doubled or halved while
+    throughput improves, direction is reversed once, then the best size is kept.
+    """
+    __window: float = 0.25
+    __gain: float = 1.05
+
+    def __init__(self, tuner: ChunkTuner, host: str, size: int):
+        self._tuner: ChunkTuner = tuner
+        self.host: str = host
+        self.size: int = size
+
+        self.best: int = size
+        self.rate: float = 0.0
+        self.stable: bool = False
+
+        self.__direction: int = 1
+        self.__reversed: bool = False
+        self.__bytes: int = 0
+        self.__start: float = time.monotonic()
+
+    def update(self, amount: int):
+        """ Accounts received chunk, read size is adjusted when measurement window ends. """
+        self.__bytes += amount
+        elapsed = time.monotonic() - self.__start
+        if self.stable or elapsed < self.__window:
+            return
+        rate = self.__bytes / elapsed
+        self.__bytes = 0
+        self.__start = time.monotonic()
+
+        if rate > self.rate * self.__gain:
+            self.rate, self.best = rate, self.size
+        elif not self.__reversed:
+            self.__reversed = True
+            self.__direction = -self.__direction
+            self.size = self.best
+        else:
+            self.size, self.stable = self.best, True
+            return
+
+        size = self.__step(self.size)
+        if size == self.size:
+            if self.__reversed:
+                self.stable = True
+                return
+            self.__reversed = True
+            self.__direction = -self.__direction
+            size = self.__step(self.size)
+        self.size = size
+
+    def __step(self, size: int) -> int:
+        size = size * 2 if self.__direction > 0 else size // 2
+        return max(self._tuner.minimum, min(self._tuner.maximum, size))
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import array
 import datetime
+import itertools
+import sys
 from dataclasses import dataclass
 
 import typing
@@ -8,11 +11,17 @@ import logging
 import aiohttp
 
 if typing.TYPE_CHECKING:
+    import numpy
+    import pyarrow
     from odata.client import Client
+    from odata._scheduler import Bandwidth, DownloadProgress, ProductDownload
 
 import odata.errors as errors
 
-from odata._helpers import TimeConverter
+from odata._helpers import TimeConverter, GeoJson
+from odata._scheduler import DownloadScheduler
+from odata._download import DownloadResult
+from odata._columns import ProductColumns
 
 logger = logging.getLogger("odata")
 
@@ -674,10 +683,13 @@ class EOProductNodeNodesModel:
 
 
 class ODataObject:
-    def __init__(self, client: Client, response: aiohttp.ClientResponse):
-        self._client: Client = client
+    """
+    Base of API objects. Response the object was created from is accepted for compatibility, but not retained.
+    """
+    __slots__ = ("_client",)
 
-        self._response: aiohttp.ClientResponse = response
+    def __init__(self, client: Client, response: typing.Optional[aiohttp.ClientResponse] = None):
+        self._client: Client = client
 
 
 class ODataObjectCollection(ODataObject):
@@ -720,44 +732,156 @@ class OProductsCollection(ODataObjectCollection):
         self.count: int = data.get("@odata.count", 0)
 
         self.items: list[OProduct] = [OProduct(client, d, response) for d in data["value"]]
+        if client is not None and client.store is not None:
+            client.store.submit(data["value"])
+
+    def to_columns(self) -> dict[str, list]:
+        """ Products as typed columns, see ProductColumns. """
+        return ProductColumns.from_products(self.items).to_columns()
+
+    def to_numpy(self) -> dict[str, numpy.ndarray]:
+        """ Products as NumPy arrays with datetime64 dates, see ProductColumns.to_numpy. """
+        return ProductColumns.from_products(self.items).to_numpy()
+
+    def to_arrow(self) -> pyarrow.Table:
+        """ Products as Arrow table, see ProductColumns.to_arrow. """
+        return ProductColumns.from_products(self.items).to_arrow()
+
+    async def next(self) -> typing.Optional[OProductsCollection]:
+        """
+        Fetches following page, see OProductsQueryConstructor.stream for iteration over all pages.
+
+        @return: Next page or None if this one is the last
+        """
+        if not self.next_link:
+            return None
+        response, result = await self._client.http.request("get", self.next_link)
+        if not response.ok:
+            return None
+        return OProductsCollection(self._client, response, result)
+
+    async def save_all(self, concurrency: int = 4, per_host: int = 2, bandwidth: typing.Optional[float] = None,
+                       order: typing.Literal["largest", "smallest", "eviction"] = "largest",
+                       progress: typing.Optional[typing.Callable[[DownloadProgress], None]] = None,
+                       segments: int = 1,
+                       chunks: typing.Union[int, typing.Literal["auto"], None] = "auto") -> list[ProductDownload]:
+        """
+        Downloads all products of collection. Failed products do not interrupt others.
+
+        @param concurrency: Maximum number of products downloaded at once
+        @param per_host: Maximum number of products downloaded at once from single storage host download redirects to
+        @param bandwidth: Optional cap of total throughput in bytes per second
+        @param order: "largest" or "smallest" content length first, or "eviction" - soonest evicted first
+        @param progress: Callback receiving per product and aggregated throughput
+        @param segments: Byte ranges downloaded concurrently per product
+        @param chunks: Read size in bytes, tuned per host by default
+        @return: Status of every product
+        """
+        scheduler = DownloadScheduler(concurrency=concurrency, per_host=per_host, bandwidth=bandwidth, order=order,
+                                      progress=progress, segments=segments, chunks=chunks)
+        return await scheduler.run(self.items)
+
+
+class _Lazy:
+    """
+    Attribute decoded from raw JSON of object on first access, result is cached in instance under '_' prefixed name
+    and raw value under key is dropped.
+    """
+
+    def __init__(self, key: str, decode: typing.Callable[[typing.Any], typing.Any]):
+        self._key: str = key
+        self._decode: typing.Callable[[typing.Any], typing.Any] = decode
+        self._name: str = ""
+
+    def __set_name__(self, owner: type, name: str):
+        self._name = f"_{name}"
+
+    def __get__(self, instance: typing.Optional[ODataObject], owner: typing.Optional[type] = None) -> typing.Any:
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self._name)
+        except AttributeError:
+            value = self._decode(instance._data.pop(self._key, None))
+            setattr(instance, self._name, value)
+            return value
+
+    def __set__(self, instance: ODataObject, value: typing.Any):
+        instance._data.pop(self._key, None)
+        setattr(instance, self._name, value)
+
+
+def _date(value: typing.Optional[str]) -> typing.Optional[datetime.datetime]:
+    """ Missing or empty date is None, e.g. EvictionDate of product not scheduled for eviction. """
+    return TimeConverter.to_date(value) if value else None
+
+
+def _iso(date: typing.Optional[datetime.datetime]) -> typing.Optional[str]:
+    return date.isoformat() if date else None
 
 
 class OProduct(ODataObject):
     """
         Single product record.
 
+        Dates and attributes are decoded from raw JSON when first accessed, only raw values not decoded yet are kept.
+        Attributes wait for decoding as compact tuple with names and types shared between products, footprint
+        vertices are kept in flat array.
     """
+    __slots__ = ("_data", "media_type", "id", "name", "content_type", "content_length", "online", "s3_path",
+                 "checksum", "footprint", "geo_footprint",
+                 "_origin_date", "_publication_date", "_modification_date", "_eviction_date", "_content_date",
+                 "_attributes")
+    __lazy: tuple[str, ...] = ("OriginDate", "PublicationDate", "ModificationDate", "EvictionDate", "ContentDate")
+
+    origin_date: typing.Optional[datetime.datetime] = _Lazy("OriginDate", _date)
+    publication_date: typing.Optional[datetime.datetime] = _Lazy("PublicationDate", _date)
+    modification_date: typing.Optional[datetime.datetime] = _Lazy("ModificationDate", _date)
+    eviction_date: typing.Optional[datetime.datetime] = _Lazy("EvictionDate", _date)
+    content_date: typing.Optional[OProductContentDateModel] = _Lazy("ContentDate", lambda d: OProductContentDateModel(
+        TimeConverter.to_date(d.get("Start", "")),
+        TimeConverter.to_date(d.get("End", ""))
+    ) if d is not None else None)
+    attributes: dict[str, OProductAttributes] = _Lazy("Attributes", lambda a: {
+        attribute.name: attribute for attribute in a or ()
+    })
 
     def __init__(self, client: Client, data: dict, response: typing.Optional[aiohttp.ClientResponse] = None):
+        """
+        Fields missing in data, e.g. not selected by query, are None, or empty when they are collections.
+        """
         super().__init__(client, response)
-        self.media_type: str = data["@odata.mediaContentType"]
-        self.id: str = data["Id"]
-        self.name: str = data["Name"]
-        self.content_type: str = data.get("ContentType")
+        self._data: dict = {k: data[k] for k in self.__lazy if k in data}
+        if "Attributes" in data:
+            self._data["Attributes"] = tuple(OProductAttributes.compact(a) for a in data["Attributes"])
+
+        self.media_type: typing.Optional[str] = data.get("@odata.mediaContentType")
+        self.id: typing.Optional[str] = data.get("Id")
+        self.name: typing.Optional[str] = data.get("Name")
+        self.content_type: typing.Optional[str] = data.get("ContentType")
         self.content_length: int = data.get("ContentLength", 0)
-        self.origin_date: datetime.date = TimeConverter.to_date(data["OriginDate"])
-        self.publication_date: datetime.date = TimeConverter.to_date(data["PublicationDate"])
-        self.modification_date: datetime.date = TimeConverter.to_date(data["ModificationDate"])
         self.online: bool = data.get("Online", False)
-        self.eviction_date: datetime.date = TimeConverter.to_date(data["EvictionDate"])
-        self.s3_path: str = data["S3Path"]
+        self.s3_path: typing.Optional[str] = data.get("S3Path")
         self.checksum: list = data.get("Checksum", [])
-        self.content_date: OProductContentDateModel = OProductContentDateModel(
-            TimeConverter.to_date(data["ContentDate"].get("Start", "")),
-            TimeConverter.to_date(data["ContentDate"].get("End", ""))
-        )
-        self.footprint: str = data["Footprint"]
-        self.geo_footprint: OProductGeoFootprintModel = OProductGeoFootprintModel(
-            data["GeoFootprint"]["type"],
-            [ODataCoordinate(c[0], c[1]) for c in data["GeoFootprint"]["coordinates"][0]]
-        )
-
-        self.attributes: dict[OProductAttributes] = {a["Name"]: OProductAttributes(a["@odata.type"],
-                                                                                   a["Name"],
-                                                                                   a["Value"],
-                                                                                   a["ValueType"]
-                                                                                   ) for a in data.get("Attributes", [])
-                                                     }
+        self.footprint: typing.Optional[str] = data.get("Footprint")
+        self.geo_footprint: typing.Optional[OProductGeoFootprintModel] = \
+            OProductGeoFootprintModel.from_geojson(data["GeoFootprint"]) if data.get("GeoFootprint") else None
+
+    def _record(self) -> dict:
+        """ Catalogue JSON of fields ProductColumns reads, decoded dates and attributes are formatted back. """
+        data = self._data
+        record = {"Id": self.id, "Name": self.name, "ContentType": self.content_type,
+                  "ContentLength": self.content_length, "Online": self.online, "S3Path": self.s3_path}
+        for key, date in (("OriginDate", "origin_date"), ("PublicationDate", "publication_date"),
+                          ("ModificationDate", "modification_date"), ("EvictionDate", "eviction_date")):
+            record[key] = data[key] if key in data else _iso(getattr(self, f"_{date}", None))
+        if "ContentDate" in data:
+            record["ContentDate"] = data["ContentDate"]
+        elif getattr(self, "_content_date", None) is not None:
+            record["ContentDate"] = {"Start": _iso(self._content_date.start), "End": _iso(self._content_date.end)}
+        attributes = data["Attributes"] if "Attributes" in data else getattr(self, "_attributes", {}).values()
+        record["Attributes"] = [{"Name": a.name, "Value": a.value, "ValueType": a.value_type} for a in attributes]
+        return record
 
     @property
     async def nodes(self) -> typing.Optional[OProductNodesCollection]:
@@ -767,10 +891,48 @@ class OProduct(ODataObject):
 
         return OProductNodesCollection(self._client, response, await response.json())
 
-    async def save(self, name: str = ""):
-        name = name or self.name
-        result = await self._client.http.download(self._client.http.url(f"Products({self.id})/$value"),
-                                                  f"{name}.zip")
+    async def save(self, name: str = "", segments: int = 1, verify: bool = True,
+                   chunks: typing.Union[int, typing.Literal["auto"], None] = None,
+                   progress: typing.Optional[typing.Callable[[int], None]] = None,
+                   bandwidth: typing.Optional[Bandwidth] = None,
+                   location: typing.Optional[str] = None) -> DownloadResult:
+        """
+        Downloads product archive to download directory.
+
+        With ArchiveStore configured on client, archive is kept there under product Id instead and name is not used.
+        Stored archive with matching size and checksums is returned without download, other processes sharing the
+        store wait until running download of the same product finishes.
+
+        @param name: File name without extension, product name by default
+        @param segments: Number of byte ranges downloaded concurrently
+        @param verify: Verify archive against product checksums while it is written
+        @param chunks: Read size in bytes or "auto" for tuned read size, see Http.download
+        @param progress: Called with number of bytes of every received chunk
+        @param bandwidth: Shared throughput cap, see OProductsCollection.save_all
+        @param location: Archive location already resolved with Http.locate, see Http.download
+        @return: Download summary with checksum verification results
+        @raise errors.ChecksumMismatchError: If verification failed
+        """
+        archive = self._client.archive
+        url = self._client.http.url(f"Products({self.id})/$value")
+        checksums = self.checksum if verify else None
+        if archive is None:
+            name = name or self.name
+            return await self._client.http.download(url, f"{name}.zip", segments=segments, chunks=chunks,
+                                                    checksums=checksums, progress=progress, bandwidth=bandwidth,
+                                                    location=location)
+
+        async with archive.lock(self.id):
+            entry = archive.get(self.id, self.checksum, verified=verify)
+            if entry is not None:
+                logger.debug(f"File: '{entry.file}' - stored, not downloaded")
+                return DownloadResult(entry.file, entry.size, 0, checksums=entry.verified, cached=True)
+            result = await self._client.http.download(url, archive.path(self.id), segments=segments, chunks=chunks,
+                                                      checksums=checksums, progress=progress, bandwidth=bandwidth,
+                                                      location=location)
+            archive.put(self.id, self.name, result, self.checksum)
+        archive.evict(keep=self.id)
+        return result
 
 
 class OProductNodesCollection(ODataObjectCollection):
@@ -803,16 +965,60 @@ class OProductNode(ODataObject):
         return OProductNodesCollection(self._client, response, result)
 
 
-@dataclass
+@dataclass(slots=True)
 class OProductContentDateModel:
     start: datetime.date
     end: datetime.date
 
 
-@dataclass
 class OProductGeoFootprintModel:
-    type: str
-    coordinates: list[ODataCoordinate]
+    """
+    Outer ring of footprint polygon, first polygon of MultiPolygon, vertices are stored as flat array of x, y pairs.
+
+    @var type: GeoJSON geometry type
+    @var flat: x0, y0, x1, y1, ... of vertices
+    @var extent: Bounding box of whole geometry, all polygons of MultiPolygon included, when created from GeoJSON
+    """
+    __slots__ = ("type", "flat", "extent")
+
+    def __init__(self, type: str, coordinates: typing.Union[array.array, typing.Iterable[ODataCoordinate]],
+                 extent: typing.Optional[tuple[float, float, float, float]] = None):
+        self.type: str = type
+        self.flat: array.array = coordinates if isinstance(coordinates, array.array) else \
+            array.array("d", itertools.chain.from_iterable((c.x, c.y) for c in coordinates))
+        self.extent: typing.Optional[tuple[float, float, float, float]] = extent
+
+    @classmethod
+    def from_geojson(cls, data: dict) -> OProductGeoFootprintModel:
+        ring = data["coordinates"][0][0] if data["type"] == "MultiPolygon" else data["coordinates"][0]
+        flat = array.array("d", itertools.chain.from_iterable(ring))
+        if len(flat) != 2 * len(ring):
+            flat = array.array("d", itertools.chain.from_iterable(c[:2] for c in ring))
+        return cls(data["type"], flat, GeoJson.bounds(data) if data["type"] == "MultiPolygon" else None)
+
+    @property
+    def coordinates(self) -> list[ODataCoordinate]:
+        """ Vertices as new ODataCoordinate objects, use flat for bulk access. """
+        return [ODataCoordinate(self.flat[i], self.flat[i + 1]) for i in range(0, len(self.flat), 2)]
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        """ Minimum x, minimum y, maximum x and maximum y of whole geometry, of outer ring unless extent is known. """
+        if self.extent is not None:
+            return self.extent
+        xs, ys = self.flat[0::2], self.flat[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def __len__(self) -> int:
+        return len(self.flat) // 2
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, OProductGeoFootprintModel):
+            return NotImplemented
+        return self.type == other.type and self.flat == other.flat
+
+    def __repr__(self) -> str:
+        return f"OProductGeoFootprintModel(type={self.type!r}, vertices={len(self)})"
 
 
 @dataclass
@@ -820,13 +1026,19 @@ class OProductNodeNodesModel:
     uri: str
 
 
-@dataclass
+@dataclass(slots=True)
 class OProductAttributes:
     type: str
     name: str
     value: str
     value_type: str
 
+    @classmethod
+    def compact(cls, data: dict) -> OProductAttributes:
+        """ Attribute of catalogue JSON, its type, name and value type are interned as they repeat in every product. """
+        return cls(sys.intern(data["@odata.type"]), sys.intern(data["Name"]), data["Value"],
+                   sys.intern(data["ValueType"]))
+
 
 class ODataWorkflowsCollection(ODataObjectCollection):
     def __init__(self, client, response, data: dict):
@@ -836,6 +1048,19 @@ class ODataWorkflowsCollection(ODataObjectCollection):
         self.count: int = data.get("@odata.count", 0)
         self.items: tuple[ODataWorkflow] = tuple([ODataWorkflow(client, response, d) for d in data.get("value", [])])
 
+    async def next(self) -> typing.Optional[ODataWorkflowsCollection]:
+        """
+        Fetches following page, see OWorkflowsQueryConstructor.stream for iteration over all pages.
+
+        @return: Next page or None if this one is the last
+        """
+        if not self.next_link:
+            return None
+        response, result = await self._client.http.request("get", self.next_link)
+        if not response.ok:
+            return None
+        return ODataWorkflowsCollection(self._client, response, result)
+
 
 class ODataWorkflow(ODataObject):
     def __init__(self, client: Client, response, data: dict):
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import errno
+import typing
+import logging
+import os
+
+logger = logging.getLogger("odata.http")
+
+
+class FileWriter:
+    """
+    Writes downloaded data at explicit offsets with os.pwrite on small dedicated thread pool. Every stream of data
+    (whole file or single segment) gets its own WriteBuffer coalescing received chunks into large aligned writes.
+
+    @param path: File to write
+    @param size: Expected file size, space is preallocated when known
+    @param truncate: Discard previous content of file
+    @param buffer: Bytes collected by WriteBuffer before they are written
+    @param alignment: Writes of WriteBuffer end on multiple of alignment, except the last one
+    """
+    __executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+    __workers: int = 4
+
+    def __init__(self, path: str, size: int = 0, truncate: bool = False, buffer: int = 8 * 1024 * 1024,
+                 alignment: int = 1024 * 1024):
+        self.path: str = path
+        self.size: int = size
+        self.buffer: int = buffer
+        self.alignment: int = alignment
+
+        self.fd: int = os.open(path, os.O_RDWR | os.O_CREAT | (os.O_TRUNC if truncate else 0), 0o644)
+        self.__writes: set[asyncio.Future] = set()
+        if size:
+            self.__preallocate(size)
+
+    @classmethod
+    def _executor(cls) -> concurrent.futures.ThreadPoolExecutor:
+        if cls.__executor is None:
+            cls.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=cls.__workers,
+                                                                   thread_name_prefix="odata-writer")
+        return cls.__executor
+
+    def __preallocate(self, size: int):
+        if os.fstat(self.fd).st_size > size:
+            os.ftruncate(self.fd, size)
+        if not hasattr(os, "posix_fallocate"):
+            os.ftruncate(self.fd, size)
+            return
+        try:
+            os.posix_fallocate(self.fd, 0, size)
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS):
+                raise
+            os.ftruncate(self.fd, size)
+
+    def __pwrite(self, data: memoryview, offset: int) -> int:
+        written = 0
+        while written < len(data):
+            written += os.pwrite(self.fd, data[written:], offset + written)
+        return written
+
+    def write(self, data: memoryview, offset: int) -> asyncio.Future:
+        """ Schedules write of data at offset, future resolves with number of bytes written. """
+        future = asyncio.get_running_loop().run_in_executor(self._executor(), self.__pwrite, data, offset)
+        self.__writes.add(future)
+        future.add_done_callback(self.__writes.discard)
+        return future
+
+    def stream(self, offset: int, written: typing.Optional[typing.Callable[[int], None]] = None) -> WriteBuffer:
+        """
+        Buffer for sequential data starting at offset.
+
+        @param written: Called with number of bytes once they are stored in file
+        """
+        return WriteBuffer(self, offset, written)
+
+    async def close(self):
+        """
+        Closes file once scheduled writes finish. If waiting is cancelled, file is closed after them in background.
+        """
+        if not self.__writes:
+            os.close(self.fd)
+            return
+        writes = asyncio.gather(*self.__writes, return_exceptions=True)
+        writes.add_done_callback(lambda _: os.close(self.fd))
+        await asyncio.shield(writes)
+
+
+class WriteBuffer:
+    """
+    Collects sequential chunks and writes them in large blocks. Next block is collected while previous one is written,
+    at most one write is in progress.
+
+    Write in progress is never abandoned, cancelled wait leaves it pending for next flush. Only contiguous data from
+    the starting offset is reported as written, nothing after failed write is.
+
+    @var stored: End of data stored contiguously from the starting offset
+    """
+
+    def __init__(self, writer: FileWriter, offset: int, written: typing.Optional[typing.Callable[[int], None]] = None):
+        self._writer: FileWriter = writer
+        self.offset: int = offset
+        self.stored: int = offset
+        self._written: typing.Optional[typing.Callable[[int], None]] = written
+
+        self.__data: bytearray = bytearray()
+        self.__pending: typing.Optional[tuple[asyncio.Future, int]] = None
+
+    async def write(self, data: bytes):
+        self.__data += data
+        if len(self.__data) >= self._writer.buffer:
+            await self.__flush(aligned=True)
+
+    async def flush(self):
+        """ Writes all collected data and waits until it is stored, write in progress included if it was cancelled. """
+        await self.__flush(aligned=False)
+        await self.__wait()
+
+    async def __wait(self):
+        if self.__pending is None:
+            return
+        pending, offset = self.__pending
+        try:
+            written = await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            self.__pending = None
+            raise
+        except Exception:
+            self.__pending = None
+            raise
+        self.__pending = None
+        if offset != self.stored:
+            return
+        self.stored += written
+        if self._written:
+            self._written(written)
+
+    async def __flush(self, aligned: bool):
+        await self.__wait()
+        size = len(self.__data)
+        if aligned:
+            size -= (self.offset + size) % self._writer.alignment
+        if size <= 0:
+            return
+        data, self.__data = self.__data, self.__data[size:]
+        offset, self.offset = self.offset, self.offset + size
+        self.__pending = (self._writer.write(memoryview(data)[:size], offset), offset)
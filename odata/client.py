@@ -7,7 +7,15 @@ import logging
 import odata.errors as errors
 import odata.types as types
 
-from odata._http import Token, Http, Server
+from odata._http import Token, Http, Server, PoolOptions
+from odata._limits import LimitOptions
+from odata._retry import RetryPolicy
+from odata._telemetry import TransferTelemetry
+from odata._json import Decoder, DecoderName
+from odata._cache import CacheOptions
+from odata._store import MetadataStore
+from odata._archive import ArchiveStore
+from odata._registry import WorkflowRegistry
 
 logger = logging.getLogger("odata")
 
@@ -21,12 +29,28 @@ class Client:
     """
 
     def __init__(self, source: typing.Literal["creodias", "codede", "copernicus"] = "creodias",
-                 download_directory: str = "", **options):
+                 download_directory: str = "", pool: typing.Optional[PoolOptions] = None,
+                 limits: typing.Optional[LimitOptions] = None, retry: typing.Optional[RetryPolicy] = None,
+                 decoder: typing.Union[DecoderName, Decoder] = "auto", cache: typing.Optional[CacheOptions] = None,
+                 store: typing.Union[str, MetadataStore, None] = None,
+                 archive: typing.Union[str, ArchiveStore, None] = None, workflows_interval: float = 300.0,
+                 **options):
         """
         Creates client instance with configuration
 
         @param source: Name of platform to source from. Note not every platform has every endpoint.
         @param download_directory: Preferably absolute path to directory to store downloaded products from. Default directory of script.
+        @param pool: Connection pool limits of shared HTTP session. Defaults of PoolOptions are used if not provided.
+        @param limits: Adaptive concurrency limit kept per host, see LimitOptions. Current limits are in http.limits
+        @param retry: Retry of idempotent requests and per host circuit breaker, see RetryPolicy
+        @param decoder: JSON decoder of responses: "orjson", "msgspec", "json" or callable taking bytes. By default
+                        orjson or msgspec is used if installed, standard library json otherwise.
+        @param cache: Enables cache of catalogue GET responses, see CacheOptions. Counters are in http.cache.stats
+        @param store: Path of SQLite database or MetadataStore keeping fetched products across runs and processes.
+                      Products are looked up there by id or name before requesting API, see MetadataStore
+        @param archive: Directory or ArchiveStore keeping downloaded archives by product Id. Stored products are not
+                        downloaded again, see ArchiveStore for size limit
+        @param workflows_interval: Seconds workflows of workflow_registry are reloaded after
         @param options: Other options.
         """
         self.__loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
@@ -36,8 +60,19 @@ class Client:
 
         self.download = download_directory or os.getcwd()
         self._source = source
+        self._pool: typing.Optional[PoolOptions] = pool
+        self._limits: typing.Optional[LimitOptions] = limits
+        self._retry: typing.Optional[RetryPolicy] = retry
+        self._decoder: typing.Union[DecoderName, Decoder] = decoder
+        self._cache: typing.Optional[CacheOptions] = cache
+        self.store: typing.Optional[MetadataStore] = MetadataStore(store) if isinstance(store, str) else store
+        self.__own_store: bool = isinstance(store, str)
+        self.archive: typing.Optional[ArchiveStore] = ArchiveStore(archive) if isinstance(archive, str) else archive
+        self.__workflows_interval: float = workflows_interval
+        self.__registry: typing.Optional[WorkflowRegistry] = None
 
         self.__on_ready: typing.Optional[typing.Any] = None
+        self.__on_transfer: typing.Optional[typing.Callable[[TransferTelemetry], None]] = None
         self.__ready_event: asyncio.Event = asyncio.Event()
 
         self.email: str = ""
@@ -77,6 +112,18 @@ class Client:
         """
         return types.OWorkflowsQueryConstructor(self)
 
+    @property
+    def workflow_registry(self) -> WorkflowRegistry:
+        """
+        Cached catalogue of workflows by name, id and input product type, reloaded in background.
+        Await workflow_registry.ready() once before first lookups.
+
+        @return: Registry shared by all calls
+        """
+        if self.__registry is None:
+            self.__registry = WorkflowRegistry(self, self.__workflows_interval)
+        return self.__registry
+
     def run(self, email: str, password: str, totp_key: str = "",
             totp_code: str | typing.Callable[[], str] = "",
             platform: str = "creodias") -> None:
@@ -96,7 +143,10 @@ class Client:
         self.__token = Token(email, password, totp_key, totp_code, platform, self.__loop)
         self.__loop.create_task(self.__server.run())
 
-        self.http = Http(self.__token, self._source, self._download_directory)
+        self.http = Http(self.__token, self._source, self._download_directory, pool=self._pool,
+                         limits=self._limits, retry=self._retry, decoder=self._decoder,
+                         cache=self._cache)
+        self.http.on_transfer = self.__on_transfer
 
         logger.info(f"Client connection for {self.email} is live")
 
@@ -107,12 +157,17 @@ class Client:
 
     async def stop(self):
         """
-        Halts client. Token will not be refreshed.
+        Halts client. Token will not be refreshed and pooled connections are closed.
 
         @return: None
         """
         await self.__server.runner.cleanup()
         self.__token.stop()
+        if self.__registry is not None:
+            self.__registry.stop()
+        await self.http.close()
+        if self.__own_store:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.close)
         self.__loop.stop()  # TODO: Fix errors notification
 
     def ready(self, func: typing.Callable[[], None]) -> typing.Callable[[], None]:
@@ -125,6 +180,19 @@ class Client:
         self.__on_ready: typing.Callable[[], None] = func
         return func
 
+    def telemetry(self, func: typing.Callable[[TransferTelemetry], None]) -> typing.Callable[[TransferTelemetry], None]:
+        """
+        Decorated function will be called with TransferTelemetry of every running download each second and once when
+        download finishes. It is called within event loop, so it should return quickly.
+
+        @param func: Synchronous function taking telemetry
+        @return: No wrapper is created
+        """
+        self.__on_transfer = func
+        if self.http:
+            self.http.on_transfer = func
+        return func
+
     @staticmethod
     async def __exceptions(function):
         try:
@@ -10,6 +10,17 @@ class ODataHttpException(ODataException):
     """
 
 
+class CircuitOpenError(ODataHttpException):
+    """
+    Requests to host are rejected after its repeated failures.
+    """
+    def __init__(self, host: str, remaining: float):
+        message = f"Circuit of {host} is open, requests rejected for {remaining:.1f}s"
+        self.host: str = host
+        self.remaining: float = remaining
+        super().__init__(message)
+
+
 class AuthenticationFailed(ODataException):
     """
 
@@ -21,6 +32,19 @@ class AuthenticationFailed(ODataException):
         super().__init__(message)
 
 
+class ChecksumMismatchError(ODataException):
+    """
+    Downloaded file does not match checksum provided by catalogue.
+    """
+    def __init__(self, file: str, algorithm: str, expected: str, computed: str):
+        message = f"Checksum {algorithm} of '{file}' is {computed}, expected {expected}"
+        self.file: str = file
+        self.algorithm: str = algorithm
+        self.expected: str = expected
+        self.computed: str = computed
+        super().__init__(message)
+
+
 class PlatformNotSupported(ODataException):
     """
 